@@ -6,22 +6,187 @@ This application acts as a bridge between a locally hosted Ollama AI model
 and GhidraMCP, enabling AI-assisted reverse engineering tasks within Ghidra.
 """
 
-import argparse
-import json
+import functools
+import inspect
 import logging
 import sys
 import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 import re  # Added for pattern matching in enhanced error feedback
-from typing import Dict, Any, List, Optional, Tuple, Union
+from typing import Dict, Any, List, Optional, Tuple, Callable
 
 from src.config import BridgeConfig
 from src.ollama_client import OllamaClient
-from src.ghidra_client import GhidraMCPClient
-from src.command_parser import CommandParser
+from src.ghidra_client import GhidraMCPClient, READ_ONLY_COMMANDS, TOOL_COMMANDS
+from src.command_parser import CommandParser, HEX_DIGITS_RE, format_json
+from src.plan_cache import PlanCache
+
+# Turn prefixes from the conversation history. If the model starts writing one of these itself it is
+# inventing the next turn of the transcript, so generation can be stopped there.
+TRANSCRIPT_STOP_MARKERS = ("\nTool Result:", "\nUser:")
+
+# Maximum number of read-only GhidraMCP commands executed concurrently within one step
+MAX_PARALLEL_COMMANDS = 8
+
+# Longest text (chars) of one older partial output included in a compaction prompt
+MAX_COMPACTION_ITEM_CHARS = 2000
+
+# Read-only commands whose results are memoized; the current address/function follow the user's cursor
+CACHEABLE_COMMANDS = READ_ONLY_COMMANDS - {"get_current_address", "get_current_function"}
+
+# History line prefixes for each context role (other roles are capitalized)
+CONTEXT_ROLE_PREFIXES = {
+    "user": "User: ",
+    "assistant": "Assistant: ",
+    "tool_call": "Tool Call: ",
+    "tool_result": "Tool Result: ",
+    "plan": "Plan: ",
+    "summary": "Summary: ",
+}
+
+# Common tools that might be mentioned in plans
+PLANNED_TOOL_NAMES = [
+    "list_functions", "list_methods", "decompile_function", "decompile_function_by_address",
+    "rename_function", "rename_function_by_address", "set_decompiler_comment", 
+    "set_disassembly_comment", "search_functions_by_name", "disassemble_function"
+]
+
+# Context roles that are dropped (oldest first) once the context exceeds its token budget;
+# user queries, plans, answers and summaries are always kept
+EVICTABLE_CONTEXT_ROLES = frozenset({"tool_call", "tool_result"})
+
+# Precompiled patterns used on every response/report line
+NUMBERED_ITEM_RE = re.compile(r'^\s*\d+\.\s')
+PLAN_STEP_RE = re.compile(r'^\s*(\d+\.|[\-\*•])')
+
+# Phrases in a final response that indicate the model couldn't complete the task (matched on lowercase text)
+LIMITATION_PHRASES = [
+    "i cannot", "cannot directly", "i'm unable to", "unable to", 
+    "doesn't include", "not available", "no way to", "would need",
+    "don't have access", "no access to", "not possible with",
+    "not able to", "couldn't find", "missing", "not found",
+    "not supported", "no tool", "no command", "doesn't exist",
+    "the current toolset doesn't"
+]
+
+# Phrases claiming a rename/comment was done (matched on lowercase text)
+FALSE_CLAIM_PHRASES = [
+    "renamed to", "renamed the function", "function is now named",
+    "have renamed", "renamed", "new name", "changed the name",
+    "added comment", "commented", "set a comment",
+    "decompiled"
+]
+
+# Each phrase list as one alternation, so a response is scanned once instead of once per phrase
+LIMITATION_PHRASE_RE = re.compile("|".join(map(re.escape, LIMITATION_PHRASES)))
+FALSE_CLAIM_RE = re.compile("|".join(map(re.escape, FALSE_CLAIM_PHRASES)))
+
+# Patterns that indicate implied actions without explicit commands
+IMPLIED_ACTION_PATTERNS = [
+    (r"(should|will|going to|let's) rename", "rename_function"),
+    (r"(should|will|going to|let's) add comment", "set_decompiler_comment"),
+    (r"(suggest|proposed|recommend) (naming|naming it|renaming)", "rename_function"),
+    (r"(suggest|proposed|recommend) (to|that) name", "rename_function"),
+    (r"(appropriate|suitable|better|good|descriptive) name would be", "rename_function"),
+    (r"function (should|could|would) be (named|called)", "rename_function"),
+    (r"rename (the|this) function (to|as)", "rename_function"),
+    (r"naming it ['\"]([\w_]+)['\"]", "rename_function")
+]
+
+# Implied-action patterns, compiled once. Each one is searched on its own: in a single alternation a
+# match hides any other pattern overlapping it (e.g. "should rename the function to")
+IMPLIED_ACTION_RES = [re.compile(pattern, re.IGNORECASE) for pattern, _ in IMPLIED_ACTION_PATTERNS]
+
+@functools.lru_cache(maxsize=1)
+def _implied_action_database():
+    """
+    Compile the implied-action patterns into a Hyperscan database on first use, or return None
+    if the optional hyperscan package isn't installed. Importing it is deferred to here so that
+    importing the bridge doesn't pay for it.
+    
+    Hyperscan reports every pattern that matches anywhere, overlapping or not, which is what
+    searching IMPLIED_ACTION_RES one by one finds. UTF8/UCP give word characters and case folding
+    the same Unicode meaning they have in re.
+    """
+    try:
+        import hyperscan  # Optional: SIMD multi-pattern scanning of model responses
+    except ImportError:
+        return None
+    try:
+        database = hyperscan.Database()
+        database.compile(
+            expressions=[pattern.encode() for pattern, _ in IMPLIED_ACTION_PATTERNS],
+            ids=list(range(len(IMPLIED_ACTION_PATTERNS))),
+            flags=[
+                hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP
+            ] * len(IMPLIED_ACTION_PATTERNS)
+        )
+        return database
+    except Exception as e:
+        logging.getLogger("ollama-ghidra-bridge").warning(f"Could not compile implied-action patterns with Hyperscan, using re: {e}")
+        return None
+
+# Static instruction sections of the structured prompt, keyed by phase (None is the default)
+PHASE_INSTRUCTIONS = {
+    "planning": (
+        "## Planning Instructions:\n"
+        "1. Analyze the user request carefully\n"
+        "2. Create a detailed plan for addressing the query\n"
+        "3. Identify what information needs to be gathered from Ghidra\n"
+        "4. Specify which tools will be needed and in what order\n"
+        "5. Do NOT execute any commands yet - just create a plan\n"
+        "---\n\n"
+    ),
+    "execution": (
+        "## Tool Execution Instructions:\n"
+        "1. Follow the plan to execute necessary Ghidra tools\n"
+        "2. Use tools by writing `EXECUTE: tool_name(param1=value1, ...)` for each tool call\n"
+        "3. IMPORTANT FOR RENAME OPERATIONS: When using rename_function_by_address, "
+        "the function_address parameter must be the numerical address (e.g., '1800011a8'), not the function name (e.g., 'FUN_1800011a8')\n"
+        "4. Focus on gathering information, not on analyzing it yet\n"
+        "5. Execute the tools in a logical sequence\n"
+        "---\n\n"
+    ),
+    "analysis": (
+        "## Analysis Instructions:\n"
+        "1. Analyze all the information gathered from the tool executions\n"
+        "2. Connect different pieces of information to form a coherent understanding\n"
+        "3. Focus on answering the user's original question comprehensively\n"
+        "4. Format your answer clearly and concisely\n"
+        "5. Prefix your final answer with 'FINAL RESPONSE:' to indicate completion\n"
+        "---\n\n"
+    ),
+    None: (
+        "## Instructions:\n"
+        "1. Analyze the user request carefully based on available context\n"
+        "2. Use tools by writing `EXECUTE: tool_name(param1=value1, ...)` for each tool call\n"
+        "3. IMPORTANT FOR RENAME OPERATIONS: When using rename_function_by_address, "
+        "the function_address parameter must be the numerical address (e.g., '1800011a8'), not the function name (e.g., 'FUN_1800011a8')\n"
+        "4. Provide analysis along with your tool calls\n"
+        "5. Your response should be clear and concise\n"
+        "6. When you have completed your analysis, include \"FINAL RESPONSE:\" followed by your complete answer\n"
+        "---\n\n"
+    ),
+}
+
+# Closing request appended when the last context item is a user query, keyed by phase (None is the default)
+PHASE_QUERY_TAILS = {
+    "planning": "## User Query:\nPlease create a plan to address this query. Do not execute any commands yet.\n",
+    "execution": "## User Query:\nPlease execute the necessary tools to gather information for this query.\n",
+    "analysis": "## User Query:\nPlease analyze the gathered information and provide a comprehensive answer.\n",
+    None: "## User Query:\nPlease address this query using the available tools.\n",
+}
 
 # Configure logging
 def setup_logging(config):
     """Set up logging configuration."""
+    # basicConfig does nothing once the root logger has handlers (e.g. a second Bridge in the same
+    # process), so don't open a log file and console stream that would only be discarded
+    if logging.getLogger().handlers:
+        return logging.getLogger("ollama-ghidra-bridge")
+        
     handlers = []
     
     if config.logging.console_logging:
@@ -38,6 +203,35 @@ def setup_logging(config):
     
     return logging.getLogger("ollama-ghidra-bridge")
 
+@functools.lru_cache(maxsize=1)
+def _read_capabilities_file() -> Optional[str]:
+    """Read the capabilities file once per process; every Bridge instance shares the text."""
+    capabilities_file = "ai_ghidra_capabilities.txt"
+    # Look next to the package first, then in the current working directory as a fallback
+    for file_path in (os.path.join(os.path.dirname(__file__), '..', capabilities_file), capabilities_file):
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            continue
+        except Exception as e:
+            logging.getLogger("ollama-ghidra-bridge").error(f"Error reading capabilities file '{capabilities_file}': {str(e)}")
+            return None
+            
+    logging.getLogger("ollama-ghidra-bridge").warning(f"Capabilities file '{capabilities_file}' not found.")
+    return None
+
+def _dedup(items: List[Any]) -> List[Any]:
+    """Drop duplicates while keeping order (case-insensitive for strings)."""
+    seen = set()
+    unique = []
+    for item in items:
+        key = item.lower() if isinstance(item, str) else item
+        if key not in seen:
+            seen.add(key)
+            unique.append(item)
+    return unique
+
 class Bridge:
     """Main bridge class that connects Ollama with GhidraMCP."""
     
@@ -54,9 +248,39 @@ class Bridge:
         self.logger = setup_logging(config)
         self.ollama = OllamaClient(config.ollama)
         self.ghidra = GhidraMCPClient(config.ghidra)
+        # Bound client methods the AI may call, looked up once instead of per command
+        self._ghidra_dispatch: Dict[str, Callable] = {name: getattr(self.ghidra, name) for name in TOOL_COMMANDS}
+        # (command, first word) pairs in name order, for suggesting alternatives to unknown commands
+        self._sorted_commands = tuple((name, name.split('_')[0]) for name in sorted(self._ghidra_dispatch))
+        # Commands callable without arguments, introspected once rather than on every planned tool
+        self._parameterless_commands = frozenset(
+            name for name, cmd_method in self._ghidra_dispatch.items()
+            if all(
+                param.default is not inspect.Parameter.empty
+                for param in inspect.signature(cmd_method).parameters.values()
+            )
+        )
+        # Worker pool for read-only GhidraMCP commands (concurrent and prefetched execution)
+        self._executor = ThreadPoolExecutor(max_workers=MAX_PARALLEL_COMMANDS)
+        self._pending_reads: List[Future] = []  # Reads started for the current query, finished before it returns
         self.context = []  # Store conversation context
+        # Rendered history lines for the prompt window, maintained as items are added to the context
+        self._formatted_turns = deque(maxlen=max(config.context_limit, 0))
+        self._context_version = 0  # Bumped on every context change, used to key the prompt memo
+        self._context_tokens = 0  # Running token estimate of self.context
+        self._evictable_context_items = 0  # Items in self.context the token budget may drop
+        self._history_section_cache = (None, "")  # (context version, rendered history section)
         self.include_capabilities = include_capabilities
         self.capabilities_text = self._load_capabilities_text()
+        # The capabilities section never changes after load, so it is rendered once here
+        self._capabilities_section = ""
+        if self.include_capabilities and self.capabilities_text:
+            self._capabilities_section = (
+                f"## Available Tools:\n"
+                f"You have access to the following Ghidra interaction tools. "
+                f"Use the `EXECUTE: tool_name(param1=value1, ...)` format to call them.\n"
+                f"```text\n{self.capabilities_text}\n```\n---\n\n"
+            )
         self.logger.info(f"Bridge initialized with Ollama at {config.ollama.base_url} and GhidraMCP at {config.ghidra.base_url}")
         self.max_agent_steps = max_agent_steps  # Maximum number of steps for tool execution
         
@@ -67,12 +291,39 @@ class Bridge:
             'comments_added': {},           # Dict mapping addresses to comments
             'functions_analyzed': set(),    # Set of functions that have been analyzed
         }
+        self._analysis_state_version = 0  # Bumped whenever analysis_state is updated
+        self._state_section_cache = (None, "")  # (analysis state version, rendered state section)
         
         # Planning state
         self.current_plan = None
+        self.plan_cache = None
+        if config.enable_plan_cache:
+            self.plan_cache = PlanCache(
+                config.plan_cache_size,
+                config.plan_cache_threshold,
+                cache_file=config.plan_cache_file or None,
+                # GhidraMCP can't identify the open program, so the cache file itself must be per program
+                cache_key=config.ollama.model_map.get("planning") or config.ollama.model
+            )
+        
+        # Set when the execution/review loop has accepted a final response without limitations for the current query
+        self.goal_achieved = False
+        
+        # Results of read-only tools, reused until a command with side effects runs or the next query starts (LRU order)
+        self._tool_result_cache = OrderedDict()
+        self._tool_result_cache_lock = threading.Lock()
         
-        # Store partial outputs for building a cohesive final report
-        self.partial_outputs = []
+        # Large tool results are stored once here and referenced from the context by id
+        self._observation_store = {}
+        self._observation_count = 0  # Ids are never reused, even after stored results are released
+        
+        # Memoized prompts keyed by phase -> (inputs the prompt was built from, prompt string)
+        self._prompt_cache = {}
+        
+        # Store partial outputs for building a cohesive final report (bounded, compacted when large)
+        self.partial_outputs = deque(maxlen=config.partial_outputs_limit)
+        self._partial_output_chars = 0  # Running size of the partial outputs, for the compaction check
+        self._partial_output_compact_floor = 0  # Size the outputs must exceed before compacting again
         
         # Planned tools tracker - track which tools are planned and executed
         self.planned_tools_tracker = {
@@ -90,48 +341,96 @@ class Bridge:
         """Load the capabilities text from the file if the flag is set."""
         if not self.include_capabilities:
             return None
-            
-        capabilities_file = "ai_ghidra_capabilities.txt"
-        try:
-            # Assuming the script is run from the project root
-            file_path = os.path.join(os.path.dirname(__file__), '..', capabilities_file) 
-            if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return f.read()
-            else:
-                # Try reading from the current working directory as a fallback
-                if os.path.exists(capabilities_file):
-                    with open(capabilities_file, 'r', encoding='utf-8') as f:
-                        return f.read()
-                else:
-                    self.logger.warning(f"Capabilities file '{capabilities_file}' not found.")
-                    return None
-        except Exception as e:
-            self.logger.error(f"Error reading capabilities file '{capabilities_file}': {str(e)}")
-            return None
+        return _read_capabilities_file()
 
-    def _build_structured_prompt(self, phase: str = None) -> str:
+    def _add_to_context(self, item: Dict[str, str]) -> None:
         """
-        Build a structured prompt with clear sections for capabilities, history, current task,
-        and phase-specific guidance.
+        Append an item to the conversation context and to the rendered history window.
         
         Args:
-            phase: Optional phase name to customize the prompt
-            
-        Returns:
-            A structured prompt string with labeled sections
+            item: Context item with at least "role" and "content"
         """
-        # Capabilities section
-        capabilities_section = ""
-        if self.include_capabilities and self.capabilities_text:
-            capabilities_section = (
-                f"## Available Tools:\n"
-                f"You have access to the following Ghidra interaction tools. "
-                f"Use the `EXECUTE: tool_name(param1=value1, ...)` format to call them.\n"
-                f"```text\n{self.capabilities_text}\n```\n---\n\n"
-            )
-        
-        # State information section - what the agent has already done
+        self._extend_context((item,))
+
+    def _extend_context(self, items: List[Dict[str, str]]) -> None:
+        """
+        Append several items to the conversation context at once, so the context
+        version and token budget are updated once for the whole batch.
+
+        Args:
+            items: Context items with at least "role" and "content", in order
+        """
+        if not items:
+            return
+
+        for item in items:
+            self.context.append(item)
+            self._formatted_turns.append(self._format_context_item(item))
+            self._context_tokens += self._estimate_tokens(item)
+            if item["role"] in EVICTABLE_CONTEXT_ROLES:
+                self._evictable_context_items += 1
+        self._context_version += 1
+
+        # Once only plans, reviews and messages are left there is nothing to drop, so the
+        # history isn't rescanned on every addition of a long session
+        if self._context_tokens > self.config.max_context_tokens and self._evictable_context_items:
+            self._evict_context_items()
+    
+    @staticmethod
+    def _estimate_tokens(item: Dict[str, str]) -> int:
+        """Rough token estimate of a context item (~4 characters per token)."""
+        return len(item.get("content", "")) // 4
+    
+    def _evict_context_items(self) -> None:
+        """
+        Drop the oldest tool calls and results until the context fits its token budget.
+        The newest item is never dropped, and stored results of dropped items are released.
+        """
+        window_start = len(self.context) - self.config.context_limit
+        window_changed = False
+        index = 0
+        dropped = 0
+        while self._context_tokens > self.config.max_context_tokens and index < len(self.context) - 1:
+            item = self.context[index]
+            if item["role"] not in EVICTABLE_CONTEXT_ROLES:
+                index += 1
+                continue
+            del self.context[index]
+            self._context_tokens -= self._estimate_tokens(item)
+            self._evictable_context_items -= 1
+            self._observation_store.pop(item.get("ref"), None)
+            window_changed = window_changed or index + dropped >= window_start
+            dropped += 1
+            
+        if window_changed:
+            # Items inside the rendered window were dropped, so the window has to be rebuilt
+            self._reset_formatted_turns()
+        elif dropped:
+            self._context_version += 1
+    
+    def _context_window(self) -> List[Dict[str, str]]:
+        """The context items shown as conversation history: the last context_limit items (none if it is 0)."""
+        if self.config.context_limit <= 0:
+            return []  # self.context[-0:] would be the whole list
+        return self.context[-self.config.context_limit:]
+    
+    def _reset_formatted_turns(self) -> None:
+        """Re-render the history window after the context list was replaced."""
+        self._formatted_turns = deque(
+            (self._format_context_item(item) for item in self._context_window()),
+            maxlen=max(self.config.context_limit, 0)
+        )
+        self._context_version += 1
+        self._context_tokens = sum(self._estimate_tokens(item) for item in self.context)
+        self._evictable_context_items = sum(1 for item in self.context if item["role"] in EVICTABLE_CONTEXT_ROLES)
+    
+    def _state_section(self) -> str:
+        """
+        Return the rendered analysis state section, rebuilt only when the analysis state changed.
+        """
+        if self._state_section_cache[0] == self._analysis_state_version:
+            return self._state_section_cache[1]
+            
         state_section = ""
         if any(len(v) > 0 for v in self.analysis_state.values() if isinstance(v, (dict, set))):
             state_section = "## Analysis State:\n"
@@ -146,88 +445,91 @@ class Bridge:
                 state_section += f"- Already analyzed functions: {', '.join(sorted(self.analysis_state['functions_analyzed']))}\n"
             state_section += "---\n\n"
             
+        self._state_section_cache = (self._analysis_state_version, state_section)
+        return state_section
+    
+    def _history_section(self) -> str:
+        """
+        Return the rendered conversation history section, joined once per context change
+        and shared by every phase that uses the unexpanded history window.
+        """
+        if self._history_section_cache[0] != self._context_version:
+            history_section = "## Conversation History:\n" + "\n".join(self._formatted_turns) + "\n---\n\n"
+            self._history_section_cache = (self._context_version, history_section)
+        return self._history_section_cache[1]
+    
+    def _format_context_item(self, item: Dict[str, str], expand_refs: bool = False) -> str:
+        """
+        Render a context item as a line of the conversation history.
+        
+        Args:
+            item: The context item
+            expand_refs: Whether to inline the full text of stored tool results
+            
+        Returns:
+            The history line for the item
+        """
+        prefix = CONTEXT_ROLE_PREFIXES.get(item["role"]) or f"{item['role'].capitalize()}: "
+        if expand_refs and "ref" in item:
+            return f"{prefix}{self._observation_store[item['ref']]}"
+        return f"{prefix}{item['content']}"
+    
+    def _build_structured_prompt(self, phase: str = None) -> str:
+        """
+        Build a structured prompt with clear sections for capabilities, history, current task,
+        and phase-specific guidance.
+        
+        Args:
+            phase: Optional phase name to customize the prompt
+            
+        Returns:
+            A structured prompt string with labeled sections
+        """
+        # State information section - what the agent has already done
+        state_section = self._state_section()
+            
         # Current plan section
         plan_section = ""
         if self.current_plan:
             plan_section = f"## Current Plan:\n{self.current_plan}\n---\n\n"
             
+        # Reuse the previously built prompt for this phase if none of its inputs changed.
+        # String equality short-circuits on identity, so comparing the key is cheap.
+        cache_key = (state_section, plan_section, self._context_version)
+        cached = self._prompt_cache.get(phase)
+        if cached is not None and cached[0] == cache_key:
+            return cached[1]
+            
         # Conversation history section
-        history_items = []
-        for item in self.context[-self.config.context_limit:]:
-            prefix = "User: " if item["role"] == "user" else \
-                    "Assistant: " if item["role"] == "assistant" else \
-                    "Tool Call: " if item["role"] == "tool_call" else \
-                    "Tool Result: " if item["role"] == "tool_result" else \
-                    "Plan: " if item["role"] == "plan" else \
-                    "Summary: " if item["role"] == "summary" else \
-                    f"{item['role'].capitalize()}: "
-            history_items.append(f"{prefix}{item['content']}")
-        
-        history_section = "## Conversation History:\n" + "\n".join(history_items) + "\n---\n\n"
+        if phase == "analysis":
+            # The final analysis sees stored results in full; other phases only get the reference
+            history_items = [
+                self._format_context_item(item, expand_refs=True)
+                for item in self._context_window()
+            ]
+            history_section = "## Conversation History:\n" + "\n".join(history_items) + "\n---\n\n"
+        else:
+            history_section = self._history_section()
         
         # Instructions section based on the current phase
-        instructions_section = ""
-        
-        if phase == "planning":
-            instructions_section = (
-                "## Planning Instructions:\n"
-                "1. Analyze the user request carefully\n"
-                "2. Create a detailed plan for addressing the query\n"
-                "3. Identify what information needs to be gathered from Ghidra\n"
-                "4. Specify which tools will be needed and in what order\n"
-                "5. Do NOT execute any commands yet - just create a plan\n"
-                "---\n\n"
-            )
-        elif phase == "execution" or (not phase and self.current_plan):
+        if phase == "execution" or (not phase and self.current_plan):
             # If we're in execution phase or no specific phase with a plan already created
-            instructions_section = (
-                "## Tool Execution Instructions:\n"
-                "1. Follow the plan to execute necessary Ghidra tools\n"
-                "2. Use tools by writing `EXECUTE: tool_name(param1=value1, ...)` for each tool call\n"
-                "3. IMPORTANT FOR RENAME OPERATIONS: When using rename_function_by_address, "
-                "the function_address parameter must be the numerical address (e.g., '1800011a8'), not the function name (e.g., 'FUN_1800011a8')\n"
-                "4. Focus on gathering information, not on analyzing it yet\n"
-                "5. Execute the tools in a logical sequence\n"
-                "---\n\n"
-            )
-        elif phase == "analysis":
-            instructions_section = (
-                "## Analysis Instructions:\n"
-                "1. Analyze all the information gathered from the tool executions\n"
-                "2. Connect different pieces of information to form a coherent understanding\n"
-                "3. Focus on answering the user's original question comprehensively\n"
-                "4. Format your answer clearly and concisely\n"
-                "5. Prefix your final answer with 'FINAL RESPONSE:' to indicate completion\n"
-                "---\n\n"
-            )
+            instructions_section = PHASE_INSTRUCTIONS["execution"]
         else:
-            # Default instructions
-            instructions_section = (
-                "## Instructions:\n"
-                "1. Analyze the user request carefully based on available context\n"
-                "2. Use tools by writing `EXECUTE: tool_name(param1=value1, ...)` for each tool call\n"
-                "3. IMPORTANT FOR RENAME OPERATIONS: When using rename_function_by_address, "
-                "the function_address parameter must be the numerical address (e.g., '1800011a8'), not the function name (e.g., 'FUN_1800011a8')\n"
-                "4. Provide analysis along with your tool calls\n"
-                "5. Your response should be clear and concise\n"
-                "6. When you have completed your analysis, include \"FINAL RESPONSE:\" followed by your complete answer\n"
-                "---\n\n"
-            )
+            instructions_section = PHASE_INSTRUCTIONS.get(phase, PHASE_INSTRUCTIONS[None])
         
-        # Create the full prompt
-        full_prompt = capabilities_section + state_section + plan_section + history_section + instructions_section
+        # Create the full prompt, ordered from the most to the least stable section so consecutive
+        # prompts share the longest possible prefix (lets the server reuse its prompt cache)
+        full_prompt = self._capabilities_section + instructions_section + plan_section + state_section + history_section
         
         # Add final context for user queries
         if self.context and self.context[-1]["role"] == "user":
             if phase == "planning" or not self.current_plan:
-                full_prompt += "## User Query:\nPlease create a plan to address this query. Do not execute any commands yet.\n"
-            elif phase == "execution":
-                full_prompt += "## User Query:\nPlease execute the necessary tools to gather information for this query.\n"
-            elif phase == "analysis":
-                full_prompt += "## User Query:\nPlease analyze the gathered information and provide a comprehensive answer.\n"
+                full_prompt += PHASE_QUERY_TAILS["planning"]
             else:
-                full_prompt += "## User Query:\nPlease address this query using the available tools.\n"
+                full_prompt += PHASE_QUERY_TAILS.get(phase, PHASE_QUERY_TAILS[None])
             
+        self._prompt_cache[phase] = (cache_key, full_prompt)
         return full_prompt
     
     def _check_final_response_quality(self, response: str) -> bool:
@@ -241,22 +543,12 @@ class Bridge:
         Returns:
             True if the response is complete and satisfactory, False if it indicates incomplete analysis
         """
-        # Look for phrases that indicate the model couldn't complete the task
-        limitation_phrases = [
-            "i cannot", "cannot directly", "i'm unable to", "unable to", 
-            "doesn't include", "not available", "no way to", "would need",
-            "don't have access", "no access to", "not possible with",
-            "not able to", "couldn't find", "missing", "not found",
-            "not supported", "no tool", "no command", "doesn't exist",
-            "the current toolset doesn't"
-        ]
-        
-        # Check if the response contains any of these limitation phrases
+        # Check if the response contains any phrase indicating the model couldn't complete the task
         response_lower = response.lower()
-        for phrase in limitation_phrases:
-            if phrase in response_lower:
-                self.logger.info(f"Final response indicates limitation: '{phrase}'")
-                return False
+        match = LIMITATION_PHRASE_RE.search(response_lower)
+        if match:
+            self.logger.info(f"Final response indicates limitation: '{match.group(0)}'")
+            return False
                 
         # Check if response is too short
         if len(response.strip()) < 150:
@@ -279,46 +571,62 @@ class Bridge:
             tool_names = ", ".join([tool['tool'] for tool in pending_critical])
             self.logger.info(f"Critical planned tools not executed: {tool_names}")
             
-            # Check if the response falsely claims actions that weren't performed
-            for tool in pending_critical:
-                tool_name = tool['tool']
-                # Check for phrases that indicate the tool was used when it actually wasn't
-                false_claim_patterns = [
-                    f"renamed to", f"renamed the function", f"function is now named",
-                    f"have renamed", f"renamed", f"new name", f"changed the name",
-                    f"added comment", f"commented", f"set a comment",
-                    f"decompiled"
-                ]
-                
-                for pattern in false_claim_patterns:
-                    if pattern in response_lower and any(rename_tool in tool_name for rename_tool in ["rename", "comment"]):
-                        self.logger.warning(f"Response falsely claims an action was performed: '{pattern}' but {tool_name} was not executed")
-                        return False
+            # Check for phrases that indicate a rename/comment was done when its tool wasn't run.
+            # The response is searched once; the pending tools only name the culprit in the log
+            match = FALSE_CLAIM_RE.search(response_lower)
+            if match:
+                unexecuted = next(
+                    (tool['tool'] for tool in pending_critical
+                     if any(action in tool['tool'] for action in ("rename", "comment"))),
+                    None
+                )
+                if unexecuted:
+                    self.logger.warning(f"Response falsely claims an action was performed: '{match.group(0)}' but {unexecuted} was not executed")
             
-            # If the response doesn't falsely claim completion but critical tools are missing, still return False
+            # Critical tools are missing, so the response is incomplete whether or not it claims otherwise
             return False
             
         return True
 
-    def _execute_single_command(self, command_name: str, params: Dict[str, Any]) -> str:
+    def _execute_single_command(self, command_name: str, params: Dict[str, Any],
+                                state_updates: Optional[List[tuple]] = None) -> str:
         """
         Execute a single GhidraMCP command with enhanced error handling and automatic recovery.
         
         Args:
             command_name: Name of the GhidraMCP command
             params: Command parameters
+            state_updates: Optional list to record the analysis state update in instead of
+                applying it (used on worker threads, see _submit_read)
             
         Returns:
             Result or error string with suggestions
         """
         try:
-            # Check if the command is available in the GhidraMCP client
-            if hasattr(self.ghidra, command_name):
-                self.logger.info(f"Executing GhidraMCP command: {command_name} with params: {params}")
+            # Stored results are expanded locally, without a GhidraMCP round trip
+            if command_name == "expand_ref":
+                ref_id = params.get("ref_id", "")
+                if ref_id in self._observation_store:
+                    return self._observation_store[ref_id]
+                return f"ERROR: Unknown result reference '{ref_id}'"
                 
-                # Call the method on the GhidraMCP client
-                cmd_method = getattr(self.ghidra, command_name)
-                cmd_result = cmd_method(**params)
+            # Check if the command is available in the GhidraMCP client
+            cmd_method = self._ghidra_dispatch.get(command_name)
+            if cmd_method is not None:
+                # Only cacheable reads can have a memoized result, so skip the key and lock for the rest
+                cache_key = self._command_key(command_name, params) if command_name in CACHEABLE_COMMANDS else None
+                cmd_result = self._get_cached_tool_result(cache_key) if cache_key is not None else None
+                if cmd_result is not None:
+                    self.logger.info(f"Reusing cached result for GhidraMCP command: {command_name} with params: {params}")
+                else:
+                    self.logger.info(f"Executing GhidraMCP command: {command_name} with params: {params}")
+                    
+                    # Anything read before a change to the program may now be stale
+                    if command_name not in READ_ONLY_COMMANDS:
+                        self._clear_tool_result_cache()
+                    
+                    # Call the method on the GhidraMCP client
+                    cmd_result = cmd_method(**params)
                 
                 # Check if there was an error
                 if isinstance(cmd_result, dict) and "error" in cmd_result:
@@ -329,11 +637,16 @@ class Bridge:
                     return error_msg
                 else:
                     # Success! Update the analysis state
-                    self._update_analysis_state(command_name, params, str(cmd_result))
+                    if state_updates is None:
+                        self._update_analysis_state(command_name, params, str(cmd_result))
+                    else:
+                        state_updates.append((command_name, params, str(cmd_result)))
+                    if command_name in CACHEABLE_COMMANDS:
+                        self._cache_tool_result(cache_key, cmd_result)
                     
                     # Format the command result
                     if isinstance(cmd_result, (list, dict)):
-                        formatted_result = f"RESULT: {json.dumps(cmd_result, indent=2)}"
+                        formatted_result = f"RESULT: {format_json(cmd_result)}"
                     else:
                         formatted_result = f"RESULT: {cmd_result}"
                     return formatted_result
@@ -357,6 +670,197 @@ class Bridge:
             error_msg = self._handle_command_error(command_name, params, str(e))
             return error_msg
             
+    def _execute_commands(self, commands: List[Tuple[str, Dict[str, Any]]], prefetched: Dict[tuple, Future] = None) -> List[str]:
+        """
+        Execute a list of commands, running consecutive read-only commands concurrently.
+        Commands with side effects run on their own, in order, so later reads see their changes.
+        
+        Args:
+            commands: List of (command_name, params) tuples
+            prefetched: Optional futures of read-only commands already started while the
+                response was streaming, keyed by _command_key
+            
+        Returns:
+            The result strings, in the same order as the commands
+        """
+        # Reads started since the last command with side effects, so repeats share one call
+        started = dict(prefetched or {})
+        results = [None] * len(commands)
+        read_only_batch = []  # (index, future) for the current run of read-only commands
+        
+        for i, (command_name, params) in enumerate(commands):
+            if command_name in READ_ONLY_COMMANDS or command_name == "expand_ref":
+                key = self._command_key(command_name, params)
+                future = started.get(key)
+                if future is None:
+                    future = started[key] = self._submit_read(command_name, params)
+                read_only_batch.append((i, future))
+            else:
+                # Wait for the reads before this command, then run it on its own
+                for j, future in read_only_batch:
+                    results[j] = self._read_result(future)
+                read_only_batch = []
+                started.clear()
+                # Prefetched reads nobody uses (e.g. from a stripped SUGGESTION line) may still be
+                # running; one finishing after the write would cache what it read before the write
+                self._finish_pending_reads()
+                results[i] = self._execute_single_command(command_name, params)
+                
+        for j, future in read_only_batch:
+            results[j] = self._read_result(future)
+        
+        return results
+    
+    def _submit_read(self, command_name: str, params: Dict[str, Any]) -> Future:
+        """
+        Start a read-only command on the worker pool. Its analysis state update is only applied
+        when the result is used (see _read_result), so a prefetched read the model never issues
+        doesn't count as done, and worker threads never touch analysis_state.
+        
+        Args:
+            command_name: Name of the GhidraMCP command
+            params: Command parameters
+            
+        Returns:
+            Future of (result string, deferred state updates)
+        """
+        def run() -> Tuple[str, List[tuple]]:
+            state_updates = []
+            return self._execute_single_command(command_name, params, state_updates), state_updates
+            
+        future = self._executor.submit(run)
+        self._pending_reads.append(future)
+        return future
+    
+    def _read_result(self, future: Future) -> str:
+        """Wait for a read started with _submit_read and apply its analysis state update."""
+        result, state_updates = future.result()
+        for update in state_updates:
+            self._update_analysis_state(*update)
+        return result
+    
+    def _finish_pending_reads(self) -> None:
+        """Cancel the reads of this query that haven't started and wait for the running ones."""
+        for future in self._pending_reads:
+            future.cancel()
+        wait(self._pending_reads)
+        self._pending_reads = []
+    
+    @staticmethod
+    def _command_key(command_name: str, params: Dict[str, Any]) -> tuple:
+        """Hashable key identifying a command invocation."""
+        return (command_name, tuple(sorted((k, str(v)) for k, v in params.items())))
+    
+    def _get_cached_tool_result(self, cache_key: tuple) -> Any:
+        """Return the memoized result for a command invocation, or None if it isn't cached."""
+        if not self._tool_result_cache:
+            return None
+        with self._tool_result_cache_lock:
+            result = self._tool_result_cache.get(cache_key)
+            if result is not None:
+                self._tool_result_cache.move_to_end(cache_key)
+            return result
+    
+    def _cache_tool_result(self, cache_key: tuple, result: Any) -> None:
+        """Memoize a read-only command result, evicting the least recently used entry when full."""
+        if self.config.tool_result_cache_size <= 0:
+            return
+        with self._tool_result_cache_lock:
+            self._tool_result_cache[cache_key] = result
+            self._tool_result_cache.move_to_end(cache_key)
+            while len(self._tool_result_cache) > self.config.tool_result_cache_size:
+                self._tool_result_cache.popitem(last=False)
+    
+    def _clear_tool_result_cache(self) -> None:
+        """Drop all memoized results, e.g. after a command that changes the program."""
+        if not self._tool_result_cache:
+            return
+        with self._tool_result_cache_lock:
+            self._tool_result_cache.clear()
+    
+    def _command_prefetcher(self, prefetched: Dict[tuple, Future]) -> Callable[[str], None]:
+        """
+        Build a streaming callback that starts read-only commands as soon as the model has
+        finished writing them, instead of waiting for the whole response.
+        
+        Args:
+            prefetched: Dict to record the started futures in, keyed by _command_key
+            
+        Returns:
+            Callback taking the response text received so far
+        """
+        scan_pos = 0
+        blocked = False  # Reads after a command with side effects must wait for it
+        
+        def on_content(content: str) -> None:
+            nonlocal scan_pos, blocked
+            if blocked:
+                return
+            commands, scan_pos = CommandParser.extract_commands_incremental(content, scan_pos)
+            for command_name, params in commands:
+                if command_name not in READ_ONLY_COMMANDS:
+                    blocked = True
+                    return
+                key = self._command_key(command_name, params)
+                if key not in prefetched:
+                    self.logger.info(f"Prefetching {command_name} while the response is still streaming")
+                    prefetched[key] = self._submit_read(command_name, params)
+                    
+        return on_content
+    
+    def _planned_tool_prefetcher(self, prefetched: Dict[tuple, Future]) -> Callable[[str], None]:
+        """
+        Build a streaming callback that starts the read-only, argument-free tools a plan mentions
+        while the plan is still being generated, so their results are ready for the planned batch.
+        
+        Args:
+            prefetched: Dict to record the started futures in, keyed by _command_key
+            
+        Returns:
+            Callback taking the response text received so far
+        """
+        candidates = [
+            tool for tool in PLANNED_TOOL_NAMES
+            if tool in READ_ONLY_COMMANDS and self._is_parameterless_command(tool)
+        ]
+        
+        def on_content(content: str) -> None:
+            if not candidates:
+                return
+            lowered = content.lower()
+            for tool in [tool for tool in candidates if tool in lowered]:
+                candidates.remove(tool)
+                self.logger.info(f"Prefetching planned tool {tool} while the plan is still streaming")
+                prefetched[self._command_key(tool, {})] = self._submit_read(tool, {})
+                
+        return on_content
+    
+    def _tool_result_context_item(self, command_name: str, result: str) -> Dict[str, str]:
+        """
+        Build the context entry for a tool result. Results longer than the configured inline
+        limit are put in the observation store and only a preview plus a reference id is kept,
+        so execution and review prompts don't re-send the full output on every step.
+        
+        Args:
+            command_name: The command that produced the result
+            result: The formatted result string
+            
+        Returns:
+            Context item for the tool result
+        """
+        if command_name == "expand_ref" or len(result) <= self.config.observation_inline_limit:
+            return {"role": "tool_result", "content": result}
+            
+        self._observation_count += 1
+        ref_id = f"ref_{self._observation_count}"
+        self._observation_store[ref_id] = result
+        preview = (
+            f"{result[:500]}...\n"
+            f"[Output truncated ({len(result)} chars). Full output stored as {ref_id}; "
+            f"use EXECUTE: expand_ref(ref_id=\"{ref_id}\") to view it.]"
+        )
+        return {"role": "tool_result", "content": preview, "ref": ref_id}
+    
     def _find_similar_commands(self, unknown_command: str) -> List[str]:
         """
         Find similar commands to suggest when an unknown command is used.
@@ -367,28 +871,22 @@ class Bridge:
         Returns:
             List of similar command suggestions
         """
-        available_commands = [
-            name for name in dir(self.ghidra) 
-            if not name.startswith('_') and callable(getattr(self.ghidra, name))
-        ]
-        
         # Find commands with similar prefix or suffix
         similar_commands = []
         
         # Split the unknown command by underscores
         parts = unknown_command.split('_')
         
-        for cmd in available_commands:
-            # Check for commands with similar prefix
-            if cmd.startswith(parts[0]) or unknown_command.startswith(cmd.split('_')[0]):
-                similar_commands.append(cmd)
-                continue
-                
-            # Check for commands with similar purpose
-            if len(parts) > 1 and parts[-1] in cmd:
+        for cmd, cmd_prefix in self._sorted_commands:
+            # Check for commands with similar prefix, then for commands with similar purpose
+            if (cmd.startswith(parts[0]) or unknown_command.startswith(cmd_prefix)
+                    or (len(parts) > 1 and parts[-1] in cmd)):
                 similar_commands.append(cmd)
+                # Only the first 3 are suggested, so stop scanning once they are found
+                if len(similar_commands) == 3:
+                    break
                 
-        return similar_commands[:3]  # Return top 3 similar commands
+        return similar_commands
 
     def process_query(self, query: str) -> str:
         """
@@ -401,51 +899,39 @@ class Bridge:
             The processed response with command results
         """
         # Add the query to context
-        self.context.append({"role": "user", "content": query})
+        self._add_to_context({"role": "user", "content": query})
         
         # Initialize state for this query
         self.current_plan = None
+        self.goal_achieved = False
         self.planned_tools_tracker = {
             'planned': [], 'executed': [], 'pending_critical': []
         }
         final_response = ""
-        self.partial_outputs = []
+        self.partial_outputs = deque(maxlen=self.config.partial_outputs_limit)
+        self._partial_output_chars = 0
+        self._partial_output_compact_floor = 0
         tool_errors_encountered = False
         
+        # The program may have been changed in the Ghidra GUI since the last query
+        self._clear_tool_result_cache()
+        
         try:
             # 1. PLANNING PHASE: Create a plan for addressing the query
-            self.logger.info("Starting planning phase")
-            
-            # Send to Ollama for planning
-            planning_prompt = self._build_structured_prompt(phase="planning")
-            planning_response = self.ollama.generate_with_phase(
-                planning_prompt,
-                phase="planning"
-            )
-            self.logger.info(f"Received planning response: {planning_response[:100]}...")
-            
-            # Extract planned tools from the plan
-            self._extract_planned_tools(planning_response)
-            
-            # Store the plan in the context and the state
-            self.current_plan = planning_response
-            self.context.append({"role": "plan", "content": planning_response})
-            
-            # Store in partial outputs for reporting
-            self.partial_outputs.append({
-                "type": "planning", 
-                "content": planning_response,
-                "phase": "planning"
-            })
-            
-            self.logger.info("Planning phase completed")
+            planning_prefetched = {}  # Futures of planned tools started while the plan streams
+            planning_response = self._run_planning_phase(query, planning_prefetched)
             
             # Check if this is a clarification request
             if self._check_for_clarification_request(planning_response):
                 return planning_response
             
             # 2. EXECUTION PHASE: Execute tools based on the plan
-            execution_response = self._run_execution_phase()
+            execution_response = self._run_execution_phase(planning_prefetched)
+            
+            # Skip the extra analysis round trip if the review loop already accepted a final response
+            if self.goal_achieved:
+                self.logger.info("Final response already accepted during review, skipping analysis phase")
+                return CommandParser.remove_commands(execution_response)
             
             # 3. ANALYSIS PHASE: Analyze the results
             self.logger.info("Starting analysis phase to generate final response")
@@ -454,7 +940,7 @@ class Bridge:
                 analysis_prompt,
                 phase="analysis"
             )
-            self.logger.info(f"Received analysis response: {analysis_response[:100]}...")
+            self.logger.info("Received analysis response: %.100s...", analysis_response)
             
             # Extract the final response
             if "FINAL RESPONSE:" in analysis_response:
@@ -475,30 +961,47 @@ class Bridge:
             error_msg = f"Error in query processing: {str(e)}"
             self.logger.error(error_msg)
             return f"An unexpected error occurred: {str(e)}"
+        finally:
+            # Prefetched reads that were never used must not outlive the query
+            self._finish_pending_reads()
     
-    def _run_planning_phase(self) -> str:
-        """Run the planning phase to determine what tools to use."""
-        self.logger.info("Starting planning phase")
+    def _run_planning_phase(self, query: str, prefetched: Dict[tuple, Future] = None) -> str:
+        """
+        Run the planning phase to determine what tools to use.
         
-        # Build the structured prompt with the current state
-        planning_prompt = self._build_structured_prompt("planning")
+        Args:
+            query: The user's query (used to look up and store cached plans)
+            prefetched: Optional dict to record futures of planned tools started while the plan streams
+            
+        Returns:
+            The planning response
+        """
+        self.logger.info("Starting planning phase")
         
-        # Send to Ollama for planning
-        planning_response = self.ollama.generate_with_phase(
-            planning_prompt,
-            phase="planning"
-        )
-        self.logger.info(f"Received planning response: {planning_response[:100]}...")
+        # Reuse the plan of a near-duplicate query if plan caching is enabled
+        cached_plan = self.plan_cache.lookup(query) if self.plan_cache else None
+        if cached_plan:
+            planning_response = cached_plan[0]
+            self.logger.info("Reusing cached plan for a similar query (similarity=%.2f)", cached_plan[1])
+        else:
+            # Send to Ollama for planning, starting planned argument-free tools while it streams
+            planning_prompt = self._build_structured_prompt(phase="planning")
+            planning_response = self.ollama.generate_with_phase(
+                planning_prompt,
+                phase="planning",
+                on_content=self._planned_tool_prefetcher(prefetched if prefetched is not None else {})
+            )
+            self.logger.info("Received planning response: %.100s...", planning_response)
         
         # Extract planned tools from the plan
         self._extract_planned_tools(planning_response)
         
         # Store the plan in the context and the state
         self.current_plan = planning_response
-        self.context.append({"role": "plan", "content": planning_response})
+        self._add_to_context({"role": "plan", "content": planning_response})
         
         # Store in partial outputs for reporting
-        self.partial_outputs.append({
+        self._add_partial_output({
             "type": "planning", 
             "content": planning_response,
             "phase": "planning"
@@ -506,16 +1009,29 @@ class Bridge:
         
         self.logger.info("Planning phase completed")
         
+        # Clarification questions aren't plans, so they are never cached
+        if self.plan_cache and not cached_plan and not self._check_for_clarification_request(planning_response):
+            self.plan_cache.store(query, planning_response)
+        
         return planning_response
 
-    def _run_execution_phase(self) -> str:
-        """Run the execution phase to execute the selected tools."""
+    def _run_execution_phase(self, prefetched: Dict[tuple, Future] = None) -> str:
+        """
+        Run the execution phase to execute the selected tools.
+        
+        Args:
+            prefetched: Optional futures of planned tools already started during planning
+        """
         self.logger.info("Starting execution phase")
         
         # Track if any errors were encountered during tool execution
         tool_errors_encountered = False
         unknown_commands_attempted = set()
         
+        # Run planned tools that don't depend on earlier results up front, so the model
+        # doesn't need a round trip just to request them
+        self._run_planned_batch(prefetched)
+        
         for step in range(self.max_agent_steps):
             # Build the structured prompt with the current state and plan
             prompt = self._build_structured_prompt()
@@ -524,15 +1040,18 @@ class Bridge:
             self.logger.info(f"Step {step+1}/{self.max_agent_steps}: Sending query to Ollama")
             
             try:
-                # Get AI response
+                # Get AI response, starting read-only commands while it streams in
+                prefetched = {}
                 ai_response = self.ollama.generate_with_phase(
                     prompt,
-                    phase="execution"
+                    phase="execution",
+                    stop_markers=TRANSCRIPT_STOP_MARKERS,
+                    on_content=self._command_prefetcher(prefetched)
                 )
-                self.logger.info(f"Received response from Ollama: {ai_response[:100]}...")
+                self.logger.info("Received response from Ollama: %.100s...", ai_response)
                 
                 # Capture the full response as logged
-                self.partial_outputs.append({
+                self._add_partial_output({
                     "type": "raw_response",
                     "content": ai_response,
                     "step": step + 1
@@ -546,18 +1065,15 @@ class Bridge:
                 # Extract any tool suggestions
                 ai_response, suggestions = self._extract_suggestions(ai_response)
                 
-                # Parse commands from the response
-                commands = CommandParser.extract_commands(ai_response)
-                
-                # Clean the response text (remove EXECUTE blocks)
-                clean_response = self._remove_commands(ai_response)
+                # Parse commands from the response and clean the text (remove EXECUTE blocks) in one scan
+                commands, clean_response = CommandParser.extract_commands_and_clean(ai_response)
                 
                 # Add the clean response to context
                 if clean_response.strip():
-                    self.context.append({"role": "assistant", "content": clean_response.strip()})
+                    self._add_to_context({"role": "assistant", "content": clean_response.strip()})
                     final_response = clean_response.strip()
                     # Store the assistant's reasoning as a partial output
-                    self.partial_outputs.append({
+                    self._add_partial_output({
                         "type": "reasoning",
                         "content": clean_response.strip(),
                         "step": step + 1
@@ -568,18 +1084,17 @@ class Bridge:
                     self.logger.info("No commands found in AI response, ending tool execution loop")
                     break
                 
-                # Execute each command and add to context
+                # Execute the commands (read-only ones concurrently) and add them to context in order
                 all_results = []
                 step_errors = False
                 
-                for cmd_name, cmd_params in commands:
+                results = self._execute_commands(commands, prefetched)
+                context_items = []
+                for (cmd_name, cmd_params), result in zip(commands, results):
                     # Add tool call to context
                     params_str = ", ".join([f"{k}=\"{v}\"" for k, v in cmd_params.items()])
                     tool_call = f"EXECUTE: {cmd_name}({params_str})"
-                    self.context.append({"role": "tool_call", "content": tool_call})
-                    
-                    # Execute the command
-                    result = self._execute_single_command(cmd_name, cmd_params)
+                    context_items.append({"role": "tool_call", "content": tool_call})
                     all_results.append((tool_call, result))
                     
                     # Update planned tools tracker
@@ -594,17 +1109,18 @@ class Bridge:
                         step_errors = True
                         tool_errors_encountered = True
                     
-                    # Add result to context
-                    self.context.append({"role": "tool_result", "content": result})
+                    # Add result to context (large results are stored once and referenced)
+                    context_items.append(self._tool_result_context_item(cmd_name, result))
                     
                     # Store the tool result as a partial output
-                    self.partial_outputs.append({
+                    self._add_partial_output({
                         "type": "tool_result",
                         "tool": cmd_name,
                         "params": cmd_params,
                         "result": result,
                         "step": step + 1
                     })
+                self._extend_context(context_items)
                 
                 # Update final response with results
                 final_response = clean_response + "\n\n" + "\n".join([result for _, result in all_results])
@@ -626,6 +1142,7 @@ class Bridge:
         self.logger.info("Starting review and reasoning phase")
         review_step = 0
         has_final_response = False
+        accepted_with_limitations = False  # Final response taken as-is because tool errors left no way forward
         
         while review_step < self.max_agent_steps and not has_final_response:
             # Check if current final_response already contains "FINAL RESPONSE"
@@ -641,7 +1158,7 @@ class Bridge:
                 if implied_actions_prompt:
                     self.logger.info("Found implied actions without commands in final response")
                     # Add a prompt for the next round asking for explicit commands
-                    self.context.append({"role": "review", "content": implied_actions_prompt})
+                    self._add_to_context({"role": "review", "content": implied_actions_prompt})
                     continue  # Skip to next review round
                 
                 # Check the quality of the final response
@@ -676,7 +1193,7 @@ class Bridge:
                     if pending_tools_prompt:
                         review_prompt += pending_tools_prompt
                         
-                    self.context.append({"role": "review", "content": review_prompt})
+                    self._add_to_context({"role": "review", "content": review_prompt})
             else:
                 # Regular review prompt
                 review_prompt = (
@@ -690,7 +1207,7 @@ class Bridge:
                 if pending_tools_prompt:
                     review_prompt += pending_tools_prompt
                     
-                self.context.append({"role": "review", "content": review_prompt})
+                self._add_to_context({"role": "review", "content": review_prompt})
             
             # Build a new prompt with the review context
             prompt = self._build_structured_prompt()
@@ -699,9 +1216,10 @@ class Bridge:
             self.logger.info(f"Review step {review_step+1}/{self.max_agent_steps}: Sending query to Ollama")
             ai_review_response = self.ollama.generate_with_phase(
                 prompt,
-                phase="analysis"
+                phase="analysis",
+                stop_markers=TRANSCRIPT_STOP_MARKERS
             )
-            self.logger.info(f"Received review response: {ai_review_response[:100]}...")
+            self.logger.info("Received review response: %.100s...", ai_review_response)
             
             # Check if this is a clarification request
             if self._check_for_clarification_request(ai_review_response):
@@ -714,7 +1232,7 @@ class Bridge:
             # Clean the response and update
             clean_review = self._remove_commands(ai_review_response)
             if clean_review.strip():
-                self.context.append({"role": "assistant", "content": clean_review.strip()})
+                self._add_to_context({"role": "assistant", "content": clean_review.strip()})
                 final_response = clean_review.strip()
                 
                 # Check if this response has the final marker
@@ -730,7 +1248,7 @@ class Bridge:
                     if implied_actions_prompt:
                         self.logger.info("Found implied actions without commands in final response")
                         # Add a prompt for the next round asking for explicit commands
-                        self.context.append({"role": "review", "content": implied_actions_prompt})
+                        self._add_to_context({"role": "review", "content": implied_actions_prompt})
                         continue  # Skip to next review round
                     
                     # Check the quality of the final response
@@ -743,6 +1261,7 @@ class Bridge:
                         # If tool errors were encountered and we're near the end of review rounds, accept the response anyway
                         if tool_errors_encountered and review_step >= self.max_agent_steps - 2:
                             has_final_response = True
+                            accepted_with_limitations = True
                             self.logger.info("Accepting final response despite limitations due to tool errors")
                             final_response = potential_final
                             break
@@ -758,8 +1277,61 @@ class Bridge:
             # Generate a cohesive report from partial outputs if no final response marker was found
             final_response = self._generate_cohesive_report()
             
+        # A response accepted despite its limitations still goes through the analysis phase
+        self.goal_achieved = has_final_response and not accepted_with_limitations
         return final_response
     
+    def _run_planned_batch(self, prefetched: Dict[tuple, Future] = None) -> int:
+        """
+        Execute the planned tools that take no arguments as one batch, without consulting the model.
+        Tools that need arguments (addresses, names) still go through the per-step execution loop.
+        
+        Args:
+            prefetched: Optional futures of planned tools already started during planning
+            
+        Returns:
+            Number of tools executed in the batch
+        """
+        batch = []
+        for tool_entry in self.planned_tools_tracker['planned']:
+            cmd_name = tool_entry['tool']
+            if tool_entry['execution_status'] == 'pending' and cmd_name not in batch and self._is_parameterless_command(cmd_name):
+                batch.append(cmd_name)
+                
+        if batch:
+            self.logger.info(f"Executing {len(batch)} planned tools as a batch: {', '.join(batch)}")
+            
+        results = self._execute_commands([(cmd_name, {}) for cmd_name in batch], prefetched)
+        context_items = []
+        for cmd_name, result in zip(batch, results):
+            tool_call = f"EXECUTE: {cmd_name}()"
+            context_items.append({"role": "tool_call", "content": tool_call})
+            self._mark_tool_as_executed(cmd_name, {})
+            
+            context_items.append(self._tool_result_context_item(cmd_name, result))
+            self._add_partial_output({
+                "type": "tool_result",
+                "tool": cmd_name,
+                "params": {},
+                "result": result,
+                "step": 0
+            })
+        self._extend_context(context_items)
+            
+        return len(batch)
+    
+    def _is_parameterless_command(self, command_name: str) -> bool:
+        """
+        Check whether a GhidraMCP command can be called without any arguments.
+        
+        Args:
+            command_name: The name of the command
+            
+        Returns:
+            True if every parameter of the command has a default value
+        """
+        return command_name in self._parameterless_commands
+    
     def _remove_commands(self, text: str) -> str:
         """
         Remove EXECUTE command blocks from text to get the clean response.
@@ -790,14 +1362,21 @@ class Bridge:
         recovery_result = None
         recovery_performed = False
         suggestion = ""
+        error_lower = error_message.lower()
         
         # Function not found errors
-        if "not found" in error_message.lower() or "does not exist" in error_message.lower():
+        if "not found" in error_lower or "does not exist" in error_lower:
             if command_name in ["rename_function_by_address", "decompile_function_by_address", "disassemble_function"]:
-                # Try to get a list of functions to verify if the address exists
+                # Try to get a list of functions to verify if the address exists. Models tend to
+                # repeat a bad address, so the listing is reused until the program changes
                 self.logger.info(f"Attempting recovery by listing available functions")
                 try:
-                    functions = self.ghidra.list_functions()
+                    cache_key = self._command_key("list_functions", {})
+                    functions = self._get_cached_tool_result(cache_key)
+                    if functions is None:
+                        functions = self.ghidra.list_functions()
+                        if isinstance(functions, list):
+                            self._cache_tool_result(cache_key, functions)
                     if isinstance(functions, list) and functions:
                         recovery_result = f"Available functions (sample): {', '.join(functions[:10])}"
                         recovery_performed = True
@@ -806,17 +1385,17 @@ class Bridge:
                     self.logger.error(f"Recovery attempt failed: {str(e)}")
                     
         # Address format errors
-        if "address" in error_message.lower() and "invalid" in error_message.lower():
+        if "address" in error_lower and "invalid" in error_lower:
             if "function_address" in params:
                 # Attempt to format the address correctly
                 addr = params.get("function_address", "")
                 if addr.startswith("FUN_"):
                     suggestion = f"Function addresses should not include 'FUN_' prefix. Try '{addr[4:]}' instead."
-                elif not addr.startswith("0x") and all(c in "0123456789abcdefABCDEF" for c in addr):
+                elif not addr.startswith("0x") and HEX_DIGITS_RE.fullmatch(addr):
                     suggestion = f"Try formatting the address with '0x' prefix: '0x{addr}'"
                     
         # Network or connection errors
-        if "connection" in error_message.lower() or "timeout" in error_message.lower():
+        if "connection" in error_lower or "timeout" in error_lower:
             suggestion = "Check if Ghidra and the GhidraMCP server are running and accessible."
             
         # Get enhanced error from CommandParser
@@ -831,96 +1410,24 @@ class Bridge:
             
         return final_error
     
-    def _parse_and_execute_commands(self, response: str) -> str:
-        """
-        Parse the AI response to identify and execute GhidraMCP commands.
-        Supports both traditional EXECUTE: format and JSON tool format.
-        
-        Args:
-            response: The AI's response text
-            
-        Returns:
-            The processed response with command results
-        """
-        # Extract commands using the CommandParser (now handles both formats)
-        commands = CommandParser.extract_commands(response)
-        
-        if not commands:
-            # No commands to execute, return the response as is
-            return response
-            
-        # Process each command
-        for command_name, params in commands:
-            try:
-                # Check if the command is available in the GhidraMCP client
-                if hasattr(self.ghidra, command_name):
-                    self.logger.info(f"Executing GhidraMCP command: {command_name} with params: {params}")
-                    
-                    # Call the method on the GhidraMCP client
-                    cmd_method = getattr(self.ghidra, command_name)
-                    cmd_result = cmd_method(**params)
-                    
-                    # Check if there was an error
-                    if isinstance(cmd_result, dict) and "error" in cmd_result:
-                        error_msg = f"ERROR: {cmd_result.get('error')}"
-                        self.logger.error(error_msg)
-                        
-                        # Try to replace both traditional and JSON formats
-                        # Traditional format replacement
-                        command_str = f"EXECUTE: {command_name}({', '.join([f'{k}=\"{v}\"' for k, v in params.items()])})"
-                        response = response.replace(command_str, error_msg)
-                        
-                        # JSON format replacement (more complex)
-                        json_pattern = re.compile(r'```json\s*\{\s*"tool"\s*:\s*"' + re.escape(command_name) + r'"\s*,.*?\}\s*```', re.DOTALL)
-                        response = re.sub(json_pattern, error_msg, response)
-                    else:
-                        # Format the command result
-                        formatted_result = f"RESULT: {json.dumps(cmd_result, indent=2)}"
-                        
-                        # Replace both traditional and JSON formats
-                        # Traditional format replacement
-                        command_str = f"EXECUTE: {command_name}({', '.join([f'{k}=\"{v}\"' for k, v in params.items()])})"
-                        response = response.replace(command_str, formatted_result)
-                        
-                        # JSON format replacement
-                        json_pattern = re.compile(r'```json\s*\{\s*"tool"\s*:\s*"' + re.escape(command_name) + r'"\s*,.*?\}\s*```', re.DOTALL)
-                        response = re.sub(json_pattern, formatted_result, response)
-                else:
-                    error_msg = f"ERROR: Unknown command '{command_name}'"
-                    self.logger.error(error_msg)
-                    
-                    # Replace both traditional and JSON formats
-                    # Traditional format replacement
-                    command_str = f"EXECUTE: {command_name}({', '.join([f'{k}=\"{v}\"' for k, v in params.items()])})"
-                    response = response.replace(command_str, error_msg)
-                    
-                    # JSON format replacement
-                    json_pattern = re.compile(r'```json\s*\{\s*"tool"\s*:\s*"' + re.escape(command_name) + r'"\s*,.*?\}\s*```', re.DOTALL)
-                    response = re.sub(json_pattern, error_msg, response)
-            except Exception as e:
-                # Handle any exceptions during execution
-                error_msg = f"ERROR executing {command_name}: {str(e)}"
-                self.logger.error(error_msg)
-                
-                # Replace both formats
-                command_str = f"EXECUTE: {command_name}({', '.join([f'{k}=\"{v}\"' for k, v in params.items()])})"
-                response = response.replace(command_str, error_msg)
-                
-                json_pattern = re.compile(r'```json\s*\{\s*"tool"\s*:\s*"' + re.escape(command_name) + r'"\s*,.*?\}\s*```', re.DOTALL)
-                response = re.sub(json_pattern, error_msg, response)
-                
-        return response
+    def close(self) -> None:
+        """Stop the worker pool and close the HTTP connection pools of both clients."""
+        self._executor.shutdown(wait=True)
+        self.ghidra.close()
+        self.ollama.close()
     
     def health_check(self) -> Dict[str, bool]:
         """
-        Check the health of both Ollama and GhidraMCP services.
+        Check the health of both Ollama and GhidraMCP services. The two checks run at the
+        same time, so this waits for the slower server instead of both in turn.
         
         Returns:
             Dict with health status of each service
         """
+        ghidra_future = self._executor.submit(self.ghidra.check_health)
         return {
-            "ollama": self.ollama.health_check(),
-            "ghidra": self.ghidra.health_check()
+            "ollama": self.ollama.check_health(),
+            "ghidra": ghidra_future.result()
         }
 
     def _should_summarize_context(self) -> bool:
@@ -984,12 +1491,14 @@ class Bridge:
             new_context.extend(kept_items)
             
             self.context = new_context
+            self._reset_formatted_turns()
             self.logger.info(f"Context summarized, reduced from {len(items_to_summarize) + 5} to {len(new_context)} items")
             
         except Exception as e:
             self.logger.error(f"Error summarizing context: {str(e)}")
             # If summarization fails, fall back to simple truncation
-            self.context = self.context[-self.config.context_limit:]
+            self.context = self._context_window()
+            self._reset_formatted_turns()
             
     def _update_analysis_state(self, command_name: str, params: Dict[str, Any], result: str) -> None:
         """
@@ -1023,6 +1532,8 @@ class Bridge:
         # Track comments added
         elif command_name in ["set_decompiler_comment", "set_disassembly_comment"] and "address" in params and "comment" in params:
             self.analysis_state["comments_added"][params["address"]] = params["comment"]
+            
+        self._analysis_state_version += 1
     
     def _check_for_clarification_request(self, response: str) -> bool:
         """
@@ -1074,6 +1585,85 @@ class Bridge:
                 
         return "\n".join(cleaned_lines), suggestions
 
+    def _add_partial_output(self, output: Dict[str, Any]) -> None:
+        """
+        Record a partial output for the final report, compacting older outputs when needed.
+        
+        Args:
+            output: The partial output entry
+        """
+        if len(self.partial_outputs) == self.partial_outputs.maxlen:
+            # The deque drops its oldest entry on append
+            self._partial_output_chars -= self._output_chars(self.partial_outputs[0])
+        self.partial_outputs.append(output)
+        self._partial_output_chars += self._output_chars(output)
+        self._maybe_compact_partial_outputs()
+    
+    @staticmethod
+    def _output_chars(output: Dict[str, Any]) -> int:
+        """Size of the text a partial output contributes to the report."""
+        return len(output.get("content", "")) + len(output.get("result", ""))
+    
+    def _maybe_compact_partial_outputs(self) -> None:
+        """
+        Summarize the oldest half of the partial outputs once they use more than 70%
+        of the configured token budget, so report generation stays bounded on long queries.
+        
+        After a compaction the outputs must grow by another 25% of the budget before the next
+        one, so outputs that compaction can't shrink below the threshold (e.g. one large recent
+        tool result) don't trigger a summarization call on every append.
+        """
+        # Rough token estimate: ~4 characters per token
+        threshold_chars = self.config.partial_outputs_token_budget * 4 * 0.7
+        if self._partial_output_chars <= max(threshold_chars, self._partial_output_compact_floor):
+            return
+        estimated_tokens = self._partial_output_chars // 4
+            
+        # The plan is reported separately, so it is never compacted
+        plans = [output for output in self.partial_outputs if output["type"] == "planning"]
+        others = [output for output in self.partial_outputs if output["type"] != "planning"]
+        if len(others) < 2:
+            return
+            
+        older, recent = others[:len(others) // 2], others[len(others) // 2:]
+        
+        # Each item is truncated so the prompt itself stays within half of the budget
+        item_chars = min(MAX_COMPACTION_ITEM_CHARS, self.config.partial_outputs_token_budget * 2 // len(older))
+        older_items = []
+        for output in older:
+            if output["type"] in ["tool_result", "review_tool_result"]:
+                params_str = ", ".join(f"{k}={v}" for k, v in output.get("params", {}).items())
+                item = f"Tool {output.get('tool', 'unknown')}({params_str}): {output.get('result', '')}"
+            else:
+                item = f"{output['type'].capitalize()}: {output.get('content', '')}"
+            older_items.append(item if len(item) <= item_chars else item[:item_chars] + "... [truncated]")
+                
+        summarization_prompt = (
+            "\n".join(older_items) + "\n\n"
+            "Summarize the key findings, insights and conclusions from these analysis notes. "
+            "Preserve important technical details, especially addresses and function names. "
+            "Format the summary in bullet points with the most important information first."
+        )
+        
+        try:
+            self.logger.info(f"Compacting {len(older)} partial outputs (~{estimated_tokens} tokens)")
+            summary = self.ollama.generate_with_phase(
+                summarization_prompt,
+                phase="analysis",
+                system_prompt="You are a helpful assistant tasked with summarizing technical conversations about reverse engineering."
+            )
+            compacted = [{"type": "summary", "content": summary}]
+        except Exception as e:
+            self.logger.error(f"Error compacting partial outputs: {str(e)}")
+            # If summarization fails, fall back to dropping the oldest outputs
+            compacted = []
+            
+        self.partial_outputs = deque(plans + compacted + recent, maxlen=self.config.partial_outputs_limit)
+        self._partial_output_chars = sum(self._output_chars(output) for output in self.partial_outputs)
+        self._partial_output_compact_floor = (
+            self._partial_output_chars + self.config.partial_outputs_token_budget * 4 * 0.25
+        )
+
     def _generate_cohesive_report(self) -> str:
         """
         Generate a cohesive report from various data gathered during the analysis.
@@ -1112,44 +1702,12 @@ class Bridge:
                 continue # Skip further processing for plan content
                 
             # --- Process Reasoning (Cleaned & Raw) ---
-            if output_type in ["reasoning", "review"]:
+            if output_type in ["reasoning", "review", "summary"]:
                 # Use the cleaned reasoning/review content for keyword/structure matching
-                
-                # Extract numbered insights
-                numbered_insights = []
-                in_numbered_list = False
-                current_insight = ""
-                for line in content.split('\n'):
-                    if re.match(r'^\s*\d+\.\s', line):
-                        if in_numbered_list and current_insight.strip(): numbered_insights.append(current_insight.strip())
-                        in_numbered_list = True
-                        current_insight = line.strip()
-                    elif in_numbered_list and line.strip(): current_insight += " " + line.strip()
-                    elif in_numbered_list: # End of item
-                        if current_insight.strip(): numbered_insights.append(current_insight.strip())
-                        in_numbered_list = False
-                        current_insight = ""
-                if in_numbered_list and current_insight.strip(): numbered_insights.append(current_insight.strip())
-                if numbered_insights: report_sections["insights"].extend(numbered_insights)
-                
-                # Extract bulleted findings
-                findings_section = False
-                for line in content.split('\n'):
-                    if any(marker in line.lower() for marker in ["i found:", "findings:", "key observations:", "key finding"]):
-                        findings_section = True
-                    elif findings_section and not line.strip(): findings_section = False
-                    if findings_section or line.strip().startswith('- ') or line.strip().startswith('* '):
-                        if line.strip(): report_sections["findings"].append(line.strip())
-                        
-                # Extract conclusions
-                if any(marker in content.lower() for marker in ["in conclusion", "to summarize", "in summary", "conclusion:", "final analysis"]):
-                    conclusion_text = ""
-                    in_conclusion = False
-                    for line in content.split('\n'):
-                        if any(marker in line.lower() for marker in ["in conclusion", "to summarize", "in summary", "conclusion:", "final analysis"]):
-                            in_conclusion = True
-                        if in_conclusion and line.strip(): conclusion_text += line + "\n"
-                    if conclusion_text: report_sections["conclusions"].append(conclusion_text.strip())
+                insights, findings, conclusions = self._extract_report_features(content.splitlines())
+                report_sections["insights"].extend(insights)
+                report_sections["findings"].extend(findings)
+                report_sections["conclusions"].extend(conclusions)
                 
                 # Extract general analysis (exclude already captured parts)
                 analysis_content = content
@@ -1168,27 +1726,10 @@ class Bridge:
             if not pre_execute_text:
                 continue
             
-            # Extract numbered insights from raw text
-            numbered_insights_raw = []
-            in_numbered_list_raw = False
-            current_insight_raw = ""
-            for line in pre_execute_text.split('\n'):
-                if re.match(r'^\s*\d+\.\s', line):
-                    if in_numbered_list_raw and current_insight_raw.strip(): numbered_insights_raw.append(current_insight_raw.strip())
-                    in_numbered_list_raw = True
-                    current_insight_raw = line.strip()
-                elif in_numbered_list_raw and line.strip(): current_insight_raw += " " + line.strip()
-                elif in_numbered_list_raw:
-                    if current_insight_raw.strip(): numbered_insights_raw.append(current_insight_raw.strip())
-                    in_numbered_list_raw = False
-                    current_insight_raw = ""
-            if in_numbered_list_raw and current_insight_raw.strip(): numbered_insights_raw.append(current_insight_raw.strip())
-            if numbered_insights_raw: report_sections["insights"].extend(numbered_insights_raw)
-            
-            # Extract bulleted findings from raw text
-            for line in pre_execute_text.split('\n'):
-                 if (line.strip().startswith('- ') or line.strip().startswith('* ')):
-                     if line.strip(): report_sections["findings"].append(line.strip())
+            # Extract numbered insights and bulleted findings from raw text
+            insights, findings, _ = self._extract_report_features(pre_execute_text.splitlines(), section_markers=False)
+            report_sections["insights"].extend(insights)
+            report_sections["findings"].extend(findings)
                      
             # Extract general analysis from raw text (exclude already captured parts)
             analysis_content_raw = pre_execute_text
@@ -1223,9 +1764,7 @@ class Bridge:
         # --- Deduplicate Sections --- 
         for section in report_sections:
             if isinstance(report_sections[section], list):
-                seen = set()
-                # Keep order, filter duplicates (case-insensitive for strings)
-                report_sections[section] = [x for x in report_sections[section] if not ( (x.lower() if isinstance(x, str) else x) in seen or seen.add( (x.lower() if isinstance(x, str) else x) ) )]
+                report_sections[section] = _dedup(report_sections[section])
         
         # Option 1: Build a structured report manually
         report = self._build_structured_report(report_sections)
@@ -1233,6 +1772,63 @@ class Bridge:
         # Return the manually structured report
         return report
         
+    def _extract_report_features(self, lines: List[str], section_markers: bool = True) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Extract numbered insights, bulleted findings and conclusions from the lines of an output.
+        
+        Args:
+            lines: The lines of the output text, split once by the caller
+            section_markers: Whether to honour "findings:"/"in conclusion" style markers
+                (only bulleted findings are collected otherwise, and no conclusions)
+            
+        Returns:
+            Tuple of (insights, findings, conclusions)
+        """
+        stripped = [line.strip() for line in lines]
+        lowered = [line.lower() for line in lines] if section_markers else []
+        
+        # Extract numbered insights
+        insights = []
+        in_numbered_list = False
+        current_insight = ""
+        for line, text in zip(lines, stripped):
+            if NUMBERED_ITEM_RE.match(line):
+                if in_numbered_list and current_insight: insights.append(current_insight)
+                in_numbered_list = True
+                current_insight = text
+            elif in_numbered_list and text: current_insight += " " + text
+            elif in_numbered_list: # End of item
+                if current_insight: insights.append(current_insight)
+                in_numbered_list = False
+                current_insight = ""
+        if in_numbered_list and current_insight: insights.append(current_insight)
+        
+        # Extract bulleted findings
+        findings = []
+        if section_markers:
+            findings_section = False
+            for text, lower in zip(stripped, lowered):
+                if any(marker in lower for marker in ["i found:", "findings:", "key observations:", "key finding"]):
+                    findings_section = True
+                elif findings_section and not text: findings_section = False
+                if (findings_section or text.startswith('- ') or text.startswith('* ')) and text:
+                    findings.append(text)
+        else:
+            findings = [text for text in stripped if text.startswith('- ') or text.startswith('* ')]
+        
+        # Extract conclusions
+        conclusions = []
+        if section_markers:
+            conclusion_lines = []
+            in_conclusion = False
+            for line, text, lower in zip(lines, stripped, lowered):
+                if any(marker in lower for marker in ["in conclusion", "to summarize", "in summary", "conclusion:", "final analysis"]):
+                    in_conclusion = True
+                if in_conclusion and text: conclusion_lines.append(line)
+            if conclusion_lines: conclusions.append("\n".join(conclusion_lines).strip())
+        
+        return insights, findings, conclusions
+        
     def _build_structured_report(self, report_sections):
         """
         Build a structured report from the collected sections.
@@ -1243,37 +1839,37 @@ class Bridge:
         Returns:
             A formatted report string
         """
-        report = "# Analysis Report\n\n"
+        parts = ["# Analysis Report\n\n"]
         
         if report_sections["plan"]:
-            report += "## Initial Plan\n"
-            report += "\n".join(report_sections["plan"]) + "\n\n"
+            parts.append("## Initial Plan\n")
+            parts.append("\n".join(report_sections["plan"]) + "\n\n")
         
         if report_sections["insights"]:
-            report += "## Key Insights\n"
-            report += "\n".join(report_sections["insights"]) + "\n\n"
+            parts.append("## Key Insights\n")
+            parts.append("\n".join(report_sections["insights"]) + "\n\n")
         
         if report_sections["findings"]:
-            report += "## Findings\n"
-            report += "\n".join(report_sections["findings"]) + "\n\n"
+            parts.append("## Findings\n")
+            parts.append("\n".join(report_sections["findings"]) + "\n\n")
         
         if report_sections["analysis"]:
-            report += "## Analysis Details\n"
-            report += "\n\n".join(report_sections["analysis"]) + "\n\n"
+            parts.append("## Analysis Details\n")
+            parts.append("\n\n".join(report_sections["analysis"]) + "\n\n")
         
         if report_sections["tools"]:
-            report += "## Tools Used (Successful)\n"
-            report += "\n".join([f"- {tool}" for tool in report_sections["tools"]]) + "\n\n"
+            parts.append("## Tools Used (Successful)\n")
+            parts.append("\n".join([f"- {tool}" for tool in report_sections["tools"]]) + "\n\n")
             
         if report_sections["errors"]:
-            report += "## Errors Encountered\n"
-            report += "\n".join([f"- {error}" for error in report_sections["errors"]]) + "\n\n"
+            parts.append("## Errors Encountered\n")
+            parts.append("\n".join([f"- {error}" for error in report_sections["errors"]]) + "\n\n")
         
         if report_sections["conclusions"]:
-            report += "## Conclusions\n"
-            report += "\n".join(report_sections["conclusions"]) + "\n"
+            parts.append("## Conclusions\n")
+            parts.append("\n".join(report_sections["conclusions"]) + "\n")
         
-        return report.strip()
+        return "".join(parts).strip()
     
     def _extract_planned_tools(self, plan_text: str) -> None:
         """
@@ -1290,13 +1886,6 @@ class Bridge:
             'pending_critical': []
         }
         
-        # Common tools that might be mentioned in plans
-        common_tools = [
-            "list_functions", "list_methods", "decompile_function", "decompile_function_by_address",
-            "rename_function", "rename_function_by_address", "set_decompiler_comment", 
-            "set_disassembly_comment", "search_functions_by_name", "disassemble_function"
-        ]
-        
         # Patterns that indicate a tool is critical to the task
         critical_patterns = [
             "will need to", "essential", "necessary", "required", "important", 
@@ -1307,10 +1896,10 @@ class Bridge:
         lines = plan_text.lower().split('\n')
         for i, line in enumerate(lines):
             # Check for mentions of tools in this line
-            for tool in common_tools:
+            for tool in PLANNED_TOOL_NAMES:
                 if tool.lower() in line:
                     # Check if this is part of a numbered or bulleted step
-                    is_step = bool(re.match(r'^\s*(\d+\.|[\-\*•])', line))
+                    is_step = bool(PLAN_STEP_RE.match(line))
                     
                     # Look at surrounding context (current line and next line if available)
                     context = line
@@ -1396,25 +1985,21 @@ class Bridge:
         if "EXECUTE:" in response_text:
             return ""
             
-        # Patterns that indicate implied actions without explicit commands
-        implied_action_patterns = [
-            (r"(should|will|going to|let's) rename", "rename_function"),
-            (r"(should|will|going to|let's) add comment", "set_decompiler_comment"),
-            (r"(suggest|proposed|recommend) (naming|naming it|renaming)", "rename_function"),
-            (r"(suggest|proposed|recommend) (to|that) name", "rename_function"),
-            (r"(appropriate|suitable|better|good|descriptive) name would be", "rename_function"),
-            (r"function (should|could|would) be (named|called)", "rename_function"),
-            (r"rename (the|this) function (to|as)", "rename_function"),
-            (r"naming it ['\"]([\w_]+)['\"]", "rename_function")
-        ]
-        
-        response_lower = response_text.lower()
-        
-        # Check for implied actions
-        implied_actions = []
-        for pattern, related_tool in implied_action_patterns:
-            if re.search(pattern, response_lower):
-                implied_actions.append((pattern, related_tool))
+        # Check for implied actions (case-insensitive), listed in IMPLIED_ACTION_PATTERNS order
+        database = _implied_action_database()
+        if database is not None:
+            # Each pattern is reported at most once (HS_FLAG_SINGLEMATCH); sorting the ids restores pattern order
+            matched_ids = set()
+            database.scan(
+                response_text.encode("utf-8"),
+                match_event_handler=lambda pattern_id, start, end, flags, context: matched_ids.add(pattern_id)
+            )
+            implied_actions = [IMPLIED_ACTION_PATTERNS[pattern_id] for pattern_id in sorted(matched_ids)]
+        else:
+            implied_actions = [
+                implied_action for implied_action, pattern_re in zip(IMPLIED_ACTION_PATTERNS, IMPLIED_ACTION_RES)
+                if pattern_re.search(response_text)
+            ]
                 
         if not implied_actions:
             return ""
@@ -1423,15 +2008,15 @@ class Bridge:
         action_prompt = "\n\nYour response implies certain actions should be taken, but you didn't include explicit EXECUTE commands:\n"
         
         for pattern, tool in implied_actions:
-            matches = re.findall(pattern, response_lower)
-            if matches:
-                action_prompt += f"- You mentioned: '{pattern.replace('|', ' or ')}'\n"
+            action_prompt += f"- You mentioned: '{pattern.replace('|', ' or ')}'\n"
                 
         action_prompt += "\nPlease provide explicit EXECUTE commands to perform these actions."
         return action_prompt
 
-def main():
-    """Main entry point for the bridge application."""
+def _build_arg_parser():
+    """Build the command line parser (argparse is only imported when the CLI runs)."""
+    import argparse
+    
     parser = argparse.ArgumentParser(description="Ollama-GhidraMCP Bridge")
     parser.add_argument("--ollama-url", help="Ollama server URL")
     parser.add_argument("--ghidra-url", help="GhidraMCP server URL")
@@ -1450,7 +2035,11 @@ def main():
     parser.add_argument("--include-capabilities", action="store_true", help="Include capabilities.txt content in prompts")
     parser.add_argument("--max-steps", type=int, default=5, help="Maximum number of steps for agentic execution loop")
     
-    args = parser.parse_args()
+    return parser
+
+def main():
+    """Main entry point for the bridge application."""
+    args = _build_arg_parser().parse_args()
     
     # Set log level from arguments or environment
     if args.log_level:
@@ -1477,13 +2066,11 @@ def main():
     if args.analysis_model:
         config.ollama.model_map["analysis"] = args.analysis_model
         
-    # Initialize clients
-    ollama_client = OllamaClient(config.ollama)
-    ghidra_client = GhidraMCPClient(config.ghidra)
-    
-    # List models if requested
+    # List models if requested (only needs an Ollama client, not the whole bridge)
     if args.list_models:
+        ollama_client = OllamaClient(config.ollama)
         models = ollama_client.list_models()
+        ollama_client.close()
         if models:
             print("Available Ollama models:")
             for model in models:
@@ -1498,89 +2085,94 @@ def main():
         include_capabilities=args.include_capabilities,
         max_agent_steps=args.max_steps
     )
-    
-    # Health check for Ollama and GhidraMCP
-    ollama_health = "OK" if ollama_client.check_health() else "FAIL"
-    ghidra_health = "OK" if ghidra_client.check_health() else "FAIL"
-    
-    # List context if requested
-    if args.list_context:
-        print("\nCurrent conversation context:")
-        for i, item in enumerate(bridge.context):
-            print(f"{i}: {item.get('role', 'unknown')}: {item.get('content', '')[:50]}...")
-        return 0
-    
-    # Interactive mode
-    if args.interactive:
-        # Display banner
-        print(
-            "╔══════════════════════════════════════════════════════════════════╗\n"
-            "║                                                                  ║\n"
-            "║  OGhidra - Simplified Three-Phase Architecture                   ║\n"
-            "║  ------------------------------------------                      ║\n"
-            "║                                                                  ║\n"
-            "║  1. Planning Phase: Create a plan for addressing the query       ║\n"
-            "║  2. Tool Calling Phase: Execute tools to gather information      ║\n"
-            "║  3. Analysis Phase: Analyze results and provide answers          ║\n"
-            "║                                                                  ║\n"
-            "║  For more information, see README-ARCHITECTURE.md                ║\n"
-            "║                                                                  ║\n"
-            "╚══════════════════════════════════════════════════════════════════╝"
-        )
-        
-        print(f"Ollama-GhidraMCP Bridge (Interactive Mode)")
-        print(f"Default model: {config.ollama.model}")
-        
-        # Show health status
-        if ollama_health != "OK" or ghidra_health != "OK":
-            print(f"Health check: Ollama: {ollama_health}, GhidraMCP: {ghidra_health}")
-        
-        # Main interaction loop
-        while True:
-            try:
-                prompt = input("\nQuery (or 'exit', 'quit', 'health', 'models'): ")
-                
-                if prompt.lower() in ["exit", "quit"]:
-                    break
-                    
-                elif prompt.lower() == "health":
-                    ollama_health = "OK" if ollama_client.check_health() else "FAIL"
-                    ghidra_health = "OK" if ghidra_client.check_health() else "FAIL"
-                    print(f"Health check: Ollama: {ollama_health}, GhidraMCP: {ghidra_health}")
+    try:
+        # Reuse the bridge's Ollama client and its connection pool
+        ollama_client = bridge.ollama
+        
+        # Health check for Ollama and GhidraMCP
+        health = bridge.health_check()
+        ollama_health = "OK" if health["ollama"] else "FAIL"
+        ghidra_health = "OK" if health["ghidra"] else "FAIL"
+        
+        # List context if requested
+        if args.list_context:
+            print("\nCurrent conversation context:")
+            for i, item in enumerate(bridge.context):
+                print(f"{i}: {item.get('role', 'unknown')}: {item.get('content', '')[:50]}...")
+            return 0
+        
+        # Interactive mode
+        if args.interactive:
+            # Display banner
+            print(
+                "╔══════════════════════════════════════════════════════════════════╗\n"
+                "║                                                                  ║\n"
+                "║  OGhidra - Simplified Three-Phase Architecture                   ║\n"
+                "║  ------------------------------------------                      ║\n"
+                "║                                                                  ║\n"
+                "║  1. Planning Phase: Create a plan for addressing the query       ║\n"
+                "║  2. Tool Calling Phase: Execute tools to gather information      ║\n"
+                "║  3. Analysis Phase: Analyze results and provide answers          ║\n"
+                "║                                                                  ║\n"
+                "║  For more information, see README-ARCHITECTURE.md                ║\n"
+                "║                                                                  ║\n"
+                "╚══════════════════════════════════════════════════════════════════╝"
+            )
+            
+            print(f"Ollama-GhidraMCP Bridge (Interactive Mode)")
+            print(f"Default model: {config.ollama.model}")
+            
+            # Show health status
+            if ollama_health != "OK" or ghidra_health != "OK":
+                print(f"Health check: Ollama: {ollama_health}, GhidraMCP: {ghidra_health}")
+            
+            # Main interaction loop
+            while True:
+                try:
+                    prompt = input("\nQuery (or 'exit', 'quit', 'health', 'models'): ")
                     
-                elif prompt.lower() == "models":
-                    models = ollama_client.list_models()
-                    if models:
-                        print("Available Ollama models:")
-                        for model in models:
-                            print(f"  - {model}")
-                    else:
-                        print("No models found or error connecting to Ollama")
+                    if prompt.lower() in ["exit", "quit"]:
+                        break
+                        
+                    elif prompt.lower() == "health":
+                        health = bridge.health_check()
+                        ollama_health = "OK" if health["ollama"] else "FAIL"
+                        ghidra_health = "OK" if health["ghidra"] else "FAIL"
+                        print(f"Health check: Ollama: {ollama_health}, GhidraMCP: {ghidra_health}")
                         
-                elif prompt.strip():  # Only process non-empty prompts
-                    response = bridge.process_query(prompt)
-                    print(f"\n{response}")
+                    elif prompt.lower() == "models":
+                        models = ollama_client.list_models()
+                        if models:
+                            print("Available Ollama models:")
+                            for model in models:
+                                print(f"  - {model}")
+                        else:
+                            print("No models found or error connecting to Ollama")
+                            
+                    elif prompt.strip():  # Only process non-empty prompts
+                        response = bridge.process_query(prompt)
+                        print(f"\n{response}")
+                        
+                except KeyboardInterrupt:
+                    print("\nExiting...")
+                    break
                     
-            except KeyboardInterrupt:
-                print("\nExiting...")
-                break
+                except Exception as e:
+                    print(f"Error: {str(e)}")
+                    
+            return 0
+            
+        # Non-interactive mode - process input from stdin
+        else:
+            user_input = sys.stdin.read()
                 
-            except Exception as e:
-                print(f"Error: {str(e)}")
+            if user_input.strip():
+                response = bridge.process_query(user_input)
+                print(response)
                 
-        return 0
-        
-    # Non-interactive mode - process input from stdin
-    else:
-        user_input = ""
-        for line in sys.stdin:
-            user_input += line
-            
-        if user_input.strip():
-            response = bridge.process_query(user_input)
-            print(response)
-            
-        return 0
+            return 0
+    finally:
+        bridge.close()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
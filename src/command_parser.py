@@ -7,15 +7,46 @@ import logging
 import re
 from typing import Dict, Any, List, Tuple, Optional
 
+try:
+    import orjson  # Optional: much faster JSON encoding for large tool results
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger("ollama-ghidra-bridge.parser")
 
+# Hex digits only (empty string included, like the all(...) checks this replaces)
+HEX_DIGITS_RE = re.compile(r'[0-9a-fA-F]*')
+
+# Compiled once here rather than looked up in the re module's cache on every response
+COMMAND_RE = re.compile(r'EXECUTE:\s*([\w_]+)\((.*?)\)', re.MULTILINE)
+# A command block as removed from the clean text; unlike COMMAND_RE it may span lines
+# (group 1 is the command name, group 2 the parameter text)
+REMOVE_COMMAND_RE = re.compile(r'EXECUTE:\s*([\w_]+)\(([^)]*)\)')
+EXTRA_BLANK_LINES_RE = re.compile(r'\n\s*\n\s*\n')
+# One parameter of a command: text up to the next comma that isn't inside quotes
+# (an unterminated quote runs to the end, as before)
+PARAMETER_RE = re.compile(r"""(?:[^,"']+|"[^"]*"?|'[^']*'?)+""")
+
+# Parameters holding an address, normalized on every parsed command
+ADDRESS_PARAM_NAMES = ("address", "function_address")
+
+def format_json(obj: Any) -> str:
+    """Pretty-print a tool result as JSON, using orjson when it is installed."""
+    if orjson is not None:
+        try:
+            # Non-str keys are stringified like the stdlib does, instead of failing over to it
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            pass  # Types orjson doesn't handle go through the stdlib
+    return json.dumps(obj, indent=2)
+
 class CommandParser:
     """
     Parser for extracting and validating commands from AI responses.
     """
     
     # Command format: EXECUTE: command_name(param1=value1, param2=value2)
-    COMMAND_PATTERN = r'EXECUTE:\s*([\w_]+)\((.*?)\)'
+    COMMAND_PATTERN = COMMAND_RE.pattern
     
     @staticmethod
     def extract_commands(response: str) -> List[Tuple[str, Dict[str, str]]]:
@@ -30,8 +61,12 @@ class CommandParser:
         """
         commands = []
         
+        # Most responses contain no commands, and a substring check is far cheaper than the regex
+        if "EXECUTE:" not in response:
+            return commands
+        
         # Find all command occurrences in the response
-        matches = re.finditer(CommandParser.COMMAND_PATTERN, response, re.MULTILINE)
+        matches = COMMAND_RE.finditer(response)
         
         for match in matches:
             command_name = match.group(1)
@@ -44,10 +79,37 @@ class CommandParser:
             params = CommandParser._validate_and_transform_params(command_name, params)
             
             commands.append((command_name, params))
-            logger.debug(f"Extracted command: {command_name} with params: {params}")
+            logger.debug("Extracted command: %s with params: %s", command_name, params)
             
         return commands
     
+    @staticmethod
+    def extract_commands_incremental(response: str, start: int = 0) -> Tuple[List[Tuple[str, Dict[str, str]]], int]:
+        """
+        Extract the complete commands found from a given offset of a response that is still
+        being generated. Commands are only reported once their closing parenthesis has arrived.
+        
+        Args:
+            response: The response text received so far
+            start: Offset to resume scanning from (returned by the previous call)
+            
+        Returns:
+            Tuple of (list of (command_name, parameters_dict), offset to resume from)
+        """
+        commands = []
+        
+        if response.find("EXECUTE:", start) == -1:
+            return commands, start
+        
+        for match in COMMAND_RE.finditer(response, start):
+            command_name = match.group(1)
+            params = CommandParser._parse_parameters(match.group(2).strip())
+            params = CommandParser._validate_and_transform_params(command_name, params)
+            commands.append((command_name, params))
+            start = match.end()
+            
+        return commands, start
+    
     @staticmethod
     def _validate_and_transform_params(command_name: str, params: Dict[str, str]) -> Dict[str, str]:
         """
@@ -61,31 +123,49 @@ class CommandParser:
         Returns:
             Validated and potentially transformed parameters
         """
-        # Make a copy to avoid modifying the original
-        validated_params = params.copy()
-        
-        # For rename_function_by_address, check if function_address is a function name
-        if command_name == "rename_function_by_address" and "function_address" in validated_params:
-            addr = validated_params["function_address"]
-            
-            # If it starts with "FUN_" and the rest is hex, extract just the hex part
-            if addr.startswith("FUN_") and all(c in "0123456789abcdefABCDEF" for c in addr[4:]):
-                # Extract just the address portion
-                validated_params["function_address"] = addr[4:]
-                logger.info(f"Transformed function address from '{addr}' to '{addr[4:]}'")
-        
-        # Handle 0x prefix in addresses for various functions
-        address_param_names = ["address", "function_address"]
-        for param_name in address_param_names:
-            if param_name in validated_params:
-                addr = validated_params[param_name]
-                # If it starts with "0x", remove it
-                if addr.startswith("0x") or addr.startswith("0X"):
-                    validated_params[param_name] = addr[2:]
-                    logger.info(f"Transformed address from '{addr}' to '{addr[2:]}'")
+        # Only address parameters are ever transformed, so most commands are returned as is
+        if "address" not in params and "function_address" not in params:
+            return params
+        
+        # The original is left unmodified; it is only copied once an address actually changes
+        validated_params = params
+        
+        # Normalize each address once; the dict is only written when the value changes
+        for param_name in ADDRESS_PARAM_NAMES:
+            if param_name in params:
+                addr = params[param_name]
+                # rename_function_by_address is often given the function name (FUN_<hex>)
+                normalized = CommandParser._normalize_address(
+                    addr, strip_function_prefix=(command_name == "rename_function_by_address" and param_name == "function_address")
+                )
+                if normalized is not addr:
+                    if validated_params is params:
+                        validated_params = params.copy()
+                    validated_params[param_name] = normalized
+                    logger.info("Transformed address from '%s' to '%s'", addr, normalized)
         
         return validated_params
     
+    @staticmethod
+    def _normalize_address(addr: str, strip_function_prefix: bool = False) -> str:
+        """
+        Strip the prefixes the model commonly puts in front of an address.
+        
+        Args:
+            addr: The address as written by the model
+            strip_function_prefix: Also turn a function name like 'FUN_00401000' into its address
+            
+        Returns:
+            The bare hex address, or the same string object if nothing was stripped
+        """
+        # If it starts with "FUN_" and the rest is hex, extract just the hex part
+        if strip_function_prefix and addr.startswith("FUN_") and HEX_DIGITS_RE.fullmatch(addr, 4):
+            return addr[4:]
+        # If it starts with "0x", remove it
+        if addr.startswith(("0x", "0X")):
+            return addr[2:]
+        return addr
+    
     @staticmethod
     def _parse_parameters(params_text: str) -> Dict[str, str]:
         """
@@ -99,45 +179,20 @@ class CommandParser:
         """
         params = {}
         
-        if not params_text:
-            return params
+        # Each match is one comma-separated parameter (commas inside quotes don't split)
+        for match in PARAMETER_RE.finditer(params_text):
+            key, sep, value = match.group().partition('=')
+            if not sep:
+                continue
+            key = key.strip()
+            value = value.strip()
             
-        # Split by commas, but not within quotes
-        param_list = []
-        current = ""
-        in_quotes = False
-        quote_char = None
-        
-        for char in params_text:
-            if char in ('"', "'") and (not in_quotes or quote_char == char):
-                in_quotes = not in_quotes
-                if in_quotes:
-                    quote_char = char
-                else:
-                    quote_char = None
-                current += char
-            elif char == ',' and not in_quotes:
-                param_list.append(current.strip())
-                current = ""
-            else:
-                current += char
-                
-        if current:
-            param_list.append(current.strip())
-            
-        # Process each parameter
-        for param in param_list:
-            if '=' in param:
-                key, value = param.split('=', 1)
-                key = key.strip()
-                value = value.strip()
+            # Remove quotes if present
+            if (value.startswith('"') and value.endswith('"')) or \
+               (value.startswith("'") and value.endswith("'")):
+                value = value[1:-1]
                 
-                # Remove quotes if present
-                if (value.startswith('"') and value.endswith('"')) or \
-                   (value.startswith("'") and value.endswith("'")):
-                    value = value[1:-1]
-                    
-                params[key] = value
+            params[key] = value
         
         return params
     
@@ -154,42 +209,69 @@ class CommandParser:
         Returns:
             Formatted string representation of the results
         """
-        formatted_result = f"Results of {command}:\n"
-        formatted_result += json.dumps(result, indent=2)
-        return formatted_result
+        return f"Results of {command}:\n{format_json(result)}"
     
     @staticmethod
-    def replace_command_with_result(response: str, cmd_match: re.Match, result: str) -> str:
+    def remove_commands(text: str) -> str:
         """
-        Replace a command in the response with its execution result.
+        Remove EXECUTE command blocks from text to get the clean response.
         
         Args:
-            response: The original AI response
-            cmd_match: The regex match object for the command
-            result: The formatted result string
+            text: The text containing EXECUTE blocks
             
         Returns:
-            The response with the command replaced by its result
+            Clean text with EXECUTE blocks removed
         """
-        start, end = cmd_match.span()
-        return response[:start] + result + response[end:]
+        # Simple pattern to remove EXECUTE: command() blocks
+        clean_text = REMOVE_COMMAND_RE.sub('', text) if "EXECUTE:" in text else text
+        
+        return CommandParser._tidy_clean_text(clean_text)
     
     @staticmethod
-    def remove_commands(text: str) -> str:
+    def extract_commands_and_clean(response: str) -> Tuple[List[Tuple[str, Dict[str, str]]], str]:
         """
-        Remove EXECUTE command blocks from text to get the clean response.
+        Extract the commands from an AI response and remove them from the text in a single scan,
+        for callers that need both. Equivalent to extract_commands plus remove_commands.
         
         Args:
-            text: The text containing EXECUTE blocks
+            response: The AI's response text
             
         Returns:
-            Clean text with EXECUTE blocks removed
+            Tuple of (list of (command_name, parameters_dict), clean text with EXECUTE blocks removed)
         """
-        # Simple pattern to remove EXECUTE: command() blocks
-        clean_text = re.sub(r'EXECUTE:\s*[\w_]+\([^)]*\)', '', text)
+        commands = []
+        if "EXECUTE:" not in response:
+            return commands, CommandParser._tidy_clean_text(response)
+        
+        parts = []
+        cursor = 0
+        for match in REMOVE_COMMAND_RE.finditer(response):
+            parts.append(response[cursor:match.start()])
+            cursor = match.end()
+            
+            if "\n" in match.group(2):
+                # Commands don't span lines, so only a command written later in this block counts
+                match = COMMAND_RE.search(response, match.start() + 1, match.end())
+                if match is None:
+                    continue
+                    
+            command_name = match.group(1)
+            params = CommandParser._parse_parameters(match.group(2).strip())
+            params = CommandParser._validate_and_transform_params(command_name, params)
+            commands.append((command_name, params))
+            logger.debug("Extracted command: %s with params: %s", command_name, params)
+        parts.append(response[cursor:])
         
-        # Clean up any resulting double newlines
-        clean_text = re.sub(r'\n\s*\n\s*\n', '\n\n', clean_text)
+        return commands, CommandParser._tidy_clean_text("".join(parts))
+    
+    @staticmethod
+    def _tidy_clean_text(clean_text: str) -> str:
+        """Collapse the blank lines left where commands were removed and trim the text."""
+        # Clean up any resulting double newlines (a run needs at least three newlines).
+        # This stays a separate pass: one alternation of both patterns loses re's literal
+        # prefix search and is several times slower
+        if clean_text.count('\n') >= 3:
+            clean_text = EXTRA_BLANK_LINES_RE.sub('\n\n', clean_text)
         
         return clean_text.strip()
     
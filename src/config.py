@@ -3,226 +3,279 @@ Configuration module for the Ollama-GhidraMCP Bridge.
 """
 
 import os
+import sys
+import textwrap
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any, List
+from types import MappingProxyType
+from typing import Optional, Dict, Any, List, Mapping
 
-@dataclass
-class OllamaConfig:
-    """Configuration for the Ollama client."""
-    base_url: str = "http://localhost:11434"
-    model: str = "llama3.1"  # Updated to llama3.1 which supports tool calling
-    timeout: int = 120  # Timeout for requests in seconds
-    
-    # Model map for different phases of the simplified agentic loop
-    # If a phase is not in the map or the value is empty, the default model will be used
-    model_map: Dict[str, str] = field(default_factory=lambda: {
-        "planning": "",       # Model for planning phase 
-        "execution": "",      # Model for tool execution phase
-        "analysis": ""        # Model for final analysis phase
-    })
-    
-    # Simplified system prompt
-    default_system_prompt: str = """
+def _env_bool(env: Mapping[str, str], key: str, default: bool) -> bool:
+    """Read a boolean environment variable ("true", "yes" or "1" in any case mean True)."""
+    value = env.get(key)
+    # Only the first character is checked, so no lowercased copy is made; lstrip() returns the
+    # value itself unless it has leading whitespace (e.g. " true" from a hand-edited .env file)
+    return default if value is None else value.lstrip()[:1] in ("t", "T", "y", "Y", "1")
+
+def _env_int(env: Mapping[str, str], key: str, default: int) -> int:
+    """Read an integer environment variable."""
+    value = env.get(key)
+    return default if value is None else int(value)
+
+# (phase, environment variable) pairs for the per-phase model and system prompt overrides
+_MODEL_PHASE_ENV = tuple((phase, f"OLLAMA_MODEL_{phase.upper()}") for phase in ("planning", "execution", "analysis"))
+_SYSTEM_PROMPT_PHASE_ENV = tuple(
+    (phase, f"OLLAMA_SYSTEM_PROMPT_{phase.upper()}") for phase in ("planning", "execution", "analysis")
+)
+
+# Slotted instances (Python 3.10+) are smaller and have faster attribute access. The configs are
+# not frozen: the command line overrides fields after they are built
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# System prompts, dedented once here so the source indentation isn't sent with every request
+_DEFAULT_SYSTEM_PROMPT = textwrap.dedent("""
     You are an AI assistant specialized in reverse engineering with Ghidra.
     You can help analyze binary files by executing commands through GhidraMCP.
-    """
-    
-    # Define tools for Ollama's tool calling API
-    tools: List[Dict[str, Any]] = field(default_factory=lambda: [
-        {
-            "type": "function",
-            "function": {
-                "name": "list_methods",
-                "description": "List all function names with pagination",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "offset": {"type": "integer", "description": "Offset to start from"},
-                        "limit": {"type": "integer", "description": "Maximum number of results"}
-                    }
+""").strip()
+
+_PLANNING_SYSTEM_PROMPT = textwrap.dedent("""
+    You are a planning assistant specialized in reverse engineering with Ghidra.
+    Your task is to create a clear plan for analyzing binary files based on the user's request.
+    Focus on understanding what the user is asking for and outlining the necessary steps.
+    Do not execute any commands yet, just create a detailed plan.
+""").strip()
+
+_EXECUTION_SYSTEM_PROMPT = textwrap.dedent("""
+    You are a tool execution assistant specialized in reverse engineering with Ghidra.
+    Your task is to execute the necessary Ghidra commands to fulfill the user's request.
+    Use the EXECUTE: command_name(param1=value1, param2=value2) format to call commands.
+    Focus on retrieving the information needed, not on analysis yet.
+""").strip()
+
+_ANALYSIS_SYSTEM_PROMPT = textwrap.dedent("""
+    You are an analysis assistant specialized in reverse engineering with Ghidra.
+    Your task is to analyze the results of the tool executions and provide a comprehensive
+    answer to the user's query. Focus on clear explanations and actionable insights.
+    Prefix your final answer with "FINAL RESPONSE:" to mark the conclusion of your analysis.
+""").strip()
+
+# Defaults shared by every OllamaConfig; each instance gets a copy, built without re-evaluating the literals
+_DEFAULT_MODEL_MAP = MappingProxyType({
+    "planning": "",       # Model for planning phase 
+    "execution": "",      # Model for tool execution phase
+    "analysis": ""        # Model for final analysis phase
+})
+
+_DEFAULT_PHASE_SYSTEM_PROMPTS = MappingProxyType({
+    "planning": "",  # If empty, use planning_system_prompt
+    "execution": "", # If empty, use execution_system_prompt
+    "analysis": ""   # If empty, use analysis_system_prompt
+})
+
+_DEFAULT_TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "list_methods",
+            "description": "List all function names with pagination",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "offset": {"type": "integer", "description": "Offset to start from"},
+                    "limit": {"type": "integer", "description": "Maximum number of results"}
                 }
             }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "list_classes",
-                "description": "List all namespace/class names with pagination",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "offset": {"type": "integer", "description": "Offset to start from"},
-                        "limit": {"type": "integer", "description": "Maximum number of results"}
-                    }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "list_classes",
+            "description": "List all namespace/class names with pagination",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "offset": {"type": "integer", "description": "Offset to start from"},
+                    "limit": {"type": "integer", "description": "Maximum number of results"}
                 }
             }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "decompile_function",
-                "description": "Decompile a specific function by name",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "name": {"type": "string", "description": "Function name"}
-                    },
-                    "required": ["name"]
-                }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "decompile_function",
+            "description": "Decompile a specific function by name",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string", "description": "Function name"}
+                },
+                "required": ["name"]
             }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "rename_function",
-                "description": "Rename a function",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "old_name": {"type": "string", "description": "Current function name"},
-                        "new_name": {"type": "string", "description": "New function name"}
-                    },
-                    "required": ["old_name", "new_name"]
-                }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "rename_function",
+            "description": "Rename a function",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "old_name": {"type": "string", "description": "Current function name"},
+                    "new_name": {"type": "string", "description": "New function name"}
+                },
+                "required": ["old_name", "new_name"]
             }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "rename_function_by_address",
-                "description": "Rename function by address (IMPORTANT: Use numerical addresses only, not function names)",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "function_address": {"type": "string", "description": "Function address (numerical only, like '1800011a8')"},
-                        "new_name": {"type": "string", "description": "New function name"}
-                    },
-                    "required": ["function_address", "new_name"]
-                }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "rename_function_by_address",
+            "description": "Rename function by address (IMPORTANT: Use numerical addresses only, not function names)",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "function_address": {"type": "string", "description": "Function address (numerical only, like '1800011a8')"},
+                    "new_name": {"type": "string", "description": "New function name"}
+                },
+                "required": ["function_address", "new_name"]
             }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "list_functions",
-                "description": "List all functions in the database",
-                "parameters": {
-                    "type": "object",
-                    "properties": {}
-                }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "list_functions",
+            "description": "List all functions in the database",
+            "parameters": {
+                "type": "object",
+                "properties": {}
             }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "decompile_function_by_address",
-                "description": "Decompile function at address",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "address": {"type": "string", "description": "Function address"}
-                    },
-                    "required": ["address"]
-                }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "decompile_function_by_address",
+            "description": "Decompile function at address",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "address": {"type": "string", "description": "Function address"}
+                },
+                "required": ["address"]
             }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "list_imports",
-                "description": "List imported symbols in the program",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "offset": {"type": "integer", "description": "Offset to start from"},
-                        "limit": {"type": "integer", "description": "Maximum number of results"}
-                    }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "list_imports",
+            "description": "List imported symbols in the program",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "offset": {"type": "integer", "description": "Offset to start from"},
+                    "limit": {"type": "integer", "description": "Maximum number of results"}
                 }
             }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "list_exports", 
-                "description": "List exported functions/symbols in the program",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "offset": {"type": "integer", "description": "Offset to start from"},
-                        "limit": {"type": "integer", "description": "Maximum number of results"}
-                    }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "list_exports", 
+            "description": "List exported functions/symbols in the program",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "offset": {"type": "integer", "description": "Offset to start from"},
+                    "limit": {"type": "integer", "description": "Maximum number of results"}
                 }
             }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "list_segments",
-                "description": "List all memory segments in the program",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "offset": {"type": "integer", "description": "Offset to start from"},
-                        "limit": {"type": "integer", "description": "Maximum number of results"}
-                    }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "list_segments",
+            "description": "List all memory segments in the program",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "offset": {"type": "integer", "description": "Offset to start from"},
+                    "limit": {"type": "integer", "description": "Maximum number of results"}
                 }
             }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "search_functions_by_name",
-                "description": "Search for functions by name substring",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "query": {"type": "string", "description": "Search query string"},
-                        "offset": {"type": "integer", "description": "Offset to start from"},
-                        "limit": {"type": "integer", "description": "Maximum number of results"}
-                    },
-                    "required": ["query"]
-                }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "expand_ref",
+            "description": "Show the full output of a large tool result that was shortened in the conversation history",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "ref_id": {"type": "string", "description": "Reference id of the stored result (e.g. 'ref_1')"}
+                },
+                "required": ["ref_id"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "search_functions_by_name",
+            "description": "Search for functions by name substring",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "Search query string"},
+                    "offset": {"type": "integer", "description": "Offset to start from"},
+                    "limit": {"type": "integer", "description": "Maximum number of results"}
+                },
+                "required": ["query"]
             }
         }
-    ])
+    }
+]
+
+@dataclass(**_DATACLASS_OPTIONS)
+class OllamaConfig:
+    """Configuration for the Ollama client."""
+    base_url: str = "http://localhost:11434"
+    model: str = "llama3.1"  # Updated to llama3.1 which supports tool calling
+    timeout: int = 120  # Timeout for requests in seconds
     
-    # System prompt for each phase
-    planning_system_prompt: str = """
-    You are a planning assistant specialized in reverse engineering with Ghidra.
-    Your task is to create a clear plan for analyzing binary files based on the user's request.
-    Focus on understanding what the user is asking for and outlining the necessary steps.
-    Do not execute any commands yet, just create a detailed plan.
-    """
+    # Model map for different phases of the simplified agentic loop
+    # If a phase is not in the map or the value is empty, the default model will be used
+    model_map: Dict[str, str] = field(default_factory=_DEFAULT_MODEL_MAP.copy)
     
-    execution_system_prompt: str = """
-    You are a tool execution assistant specialized in reverse engineering with Ghidra.
-    Your task is to execute the necessary Ghidra commands to fulfill the user's request.
-    Use the EXECUTE: command_name(param1=value1, param2=value2) format to call commands.
-    Focus on retrieving the information needed, not on analysis yet.
-    """
+    # Simplified system prompt
+    default_system_prompt: str = _DEFAULT_SYSTEM_PROMPT
     
-    analysis_system_prompt: str = """
-    You are an analysis assistant specialized in reverse engineering with Ghidra.
-    Your task is to analyze the results of the tool executions and provide a comprehensive
-    answer to the user's query. Focus on clear explanations and actionable insights.
-    Prefix your final answer with "FINAL RESPONSE:" to mark the conclusion of your analysis.
-    """
+    # Define tools for Ollama's tool calling API (each config gets its own list of the shared definitions)
+    tools: List[Dict[str, Any]] = field(default_factory=_DEFAULT_TOOLS.copy)
+    
+    # System prompt for each phase
+    planning_system_prompt: str = _PLANNING_SYSTEM_PROMPT
+    execution_system_prompt: str = _EXECUTION_SYSTEM_PROMPT
+    analysis_system_prompt: str = _ANALYSIS_SYSTEM_PROMPT
     
     # System prompts for different phases
-    phase_system_prompts: Dict[str, str] = field(default_factory=lambda: {
-        "planning": "",  # If empty, use planning_system_prompt
-        "execution": "", # If empty, use execution_system_prompt
-        "analysis": ""   # If empty, use analysis_system_prompt
-    })
+    phase_system_prompts: Dict[str, str] = field(default_factory=_DEFAULT_PHASE_SYSTEM_PROMPTS.copy)
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class GhidraMCPConfig:
     """Configuration for the GhidraMCP client."""
     base_url: str = "http://localhost:8080"
     timeout: int = 30  # Timeout for requests in seconds
     mock_mode: bool = False  # Enable mock mode for testing without a GhidraMCP server
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class LoggingConfig:
     """Configuration for logging."""
     level: str = "INFO"
@@ -231,58 +284,79 @@ class LoggingConfig:
     file_logging: bool = True
     format: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class BridgeConfig:
     """Main configuration for the Bridge application."""
     ollama: OllamaConfig = field(default_factory=OllamaConfig)
     ghidra: GhidraMCPConfig = field(default_factory=GhidraMCPConfig)
     logging: LoggingConfig = field(default_factory=LoggingConfig)
     context_limit: int = 5  # Number of previous exchanges to include in context
+    max_context_tokens: int = 32000  # Estimated token budget of the stored context before old tool entries are dropped
+    partial_outputs_limit: int = 200  # Maximum number of partial outputs kept for the final report
+    partial_outputs_token_budget: int = 16000  # Estimated token budget before partial outputs are compacted
+    observation_inline_limit: int = 2000  # Tool results longer than this (chars) are stored once and referenced in prompts
+    enable_plan_cache: bool = False  # Reuse planning responses for near-duplicate queries
+    plan_cache_size: int = 64  # Maximum number of cached plans
+    plan_cache_threshold: float = 0.9  # Minimum query similarity (0-1) for reusing a cached plan
+    plan_cache_file: str = ""  # Optional JSON file to keep cached plans across runs (empty = memory only); use one file per program
+    tool_result_cache_size: int = 1024  # Read-only tool results memoized within a query (0 disables)
     
     @classmethod
     def from_env(cls) -> 'BridgeConfig':
         """Create a configuration from environment variables."""
-        # Create base Ollama config with core settings
-        ollama_config = OllamaConfig(
-            base_url=os.environ.get("OLLAMA_URL", "http://localhost:11434"),
-            model=os.environ.get("OLLAMA_MODEL", "llama3.1"),
-            timeout=int(os.environ.get("OLLAMA_TIMEOUT", "120")),
-        )
+        env = os.environ
+        
+        # Per-phase overrides; the map is only replaced if any values were defined, and the config
+        # is built once with them instead of building the defaults and then overwriting them
+        ollama_overrides = {}
         
         # Set up model map from environment variables
         model_map = {}
-        for phase in ["planning", "execution", "analysis"]:
-            env_var = f"OLLAMA_MODEL_{phase.upper()}"
-            if env_var in os.environ:
-                model_map[phase] = os.environ[env_var]
-        
-        # Only set if any values were defined
+        for phase, env_var in _MODEL_PHASE_ENV:
+            value = env.get(env_var)
+            if value is not None:
+                model_map[phase] = value
         if model_map:
-            ollama_config.model_map = model_map
+            ollama_overrides["model_map"] = model_map
             
         # Set up system prompts for different phases from environment variables
         phase_prompts = {}
-        for phase in ["planning", "execution", "analysis"]:
-            env_var = f"OLLAMA_SYSTEM_PROMPT_{phase.upper()}"
-            if env_var in os.environ:
-                phase_prompts[phase] = os.environ[env_var]
-                
-        # Only set if any values were defined
+        for phase, env_var in _SYSTEM_PROMPT_PHASE_ENV:
+            value = env.get(env_var)
+            if value is not None:
+                phase_prompts[phase] = value
         if phase_prompts:
-            ollama_config.phase_system_prompts = phase_prompts
+            ollama_overrides["phase_system_prompts"] = phase_prompts
+        
+        # Create the Ollama config with core settings
+        ollama_config = OllamaConfig(
+            base_url=env.get("OLLAMA_URL", "http://localhost:11434"),
+            model=env.get("OLLAMA_MODEL", "llama3.1"),
+            timeout=_env_int(env, "OLLAMA_TIMEOUT", 120),
+            **ollama_overrides
+        )
         
         return cls(
             ollama=ollama_config,
             ghidra=GhidraMCPConfig(
-                base_url=os.environ.get("GHIDRA_MCP_URL", "http://localhost:8080"),
-                timeout=int(os.environ.get("GHIDRA_MCP_TIMEOUT", "30")),
-                mock_mode=os.environ.get("GHIDRA_MOCK_MODE", "false").lower() == "true",
+                base_url=env.get("GHIDRA_MCP_URL", "http://localhost:8080"),
+                timeout=_env_int(env, "GHIDRA_MCP_TIMEOUT", 30),
+                mock_mode=_env_bool(env, "GHIDRA_MOCK_MODE", False),
             ),
             logging=LoggingConfig(
-                level=os.environ.get("LOG_LEVEL", "INFO"),
-                log_file=os.environ.get("LOG_FILE", "bridge.log"),
-                console_logging=os.environ.get("LOG_CONSOLE", "true").lower() == "true",
-                file_logging=os.environ.get("LOG_FILE_ENABLED", "true").lower() == "true",
+                level=env.get("LOG_LEVEL", "INFO"),
+                log_file=env.get("LOG_FILE", "bridge.log"),
+                console_logging=_env_bool(env, "LOG_CONSOLE", True),
+                file_logging=_env_bool(env, "LOG_FILE_ENABLED", True),
             ),
-            context_limit=int(os.environ.get("CONTEXT_LIMIT", "5")),
-        ) 
\ No newline at end of file
+            context_limit=_env_int(env, "CONTEXT_LIMIT", 5),
+            max_context_tokens=_env_int(env, "MAX_CONTEXT_TOKENS", 32000),
+            partial_outputs_limit=_env_int(env, "PARTIAL_OUTPUTS_LIMIT", 200),
+            partial_outputs_token_budget=_env_int(env, "PARTIAL_OUTPUTS_TOKEN_BUDGET", 16000),
+            observation_inline_limit=_env_int(env, "OBSERVATION_INLINE_LIMIT", 2000),
+            enable_plan_cache=_env_bool(env, "ENABLE_PLAN_CACHE", False),
+            plan_cache_size=_env_int(env, "PLAN_CACHE_SIZE", 64),
+            plan_cache_threshold=float(env.get("PLAN_CACHE_THRESHOLD", "0.9")),
+            plan_cache_file=env.get("PLAN_CACHE_FILE", ""),
+            tool_result_cache_size=_env_int(env, "TOOL_RESULT_CACHE_SIZE", 1024),
+        )
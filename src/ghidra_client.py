@@ -13,6 +13,24 @@ from src.config import GhidraMCPConfig
 
 logger = logging.getLogger("ollama-ghidra-bridge.ghidra")
 
+# Commands that only read from the program and can safely run concurrently
+READ_ONLY_COMMANDS = frozenset({
+    "list_methods", "list_classes", "list_segments", "list_imports", "list_exports",
+    "list_namespaces", "list_data_items", "list_functions", "search_functions_by_name",
+    "decompile_function", "decompile_function_by_address", "disassemble_function",
+    "get_function_by_address", "get_current_address", "get_current_function",
+})
+
+# Commands that modify the program
+WRITE_COMMANDS = frozenset({
+    "rename_function", "rename_data", "rename_variable", "rename_function_by_address",
+    "set_decompiler_comment", "set_disassembly_comment", "set_function_prototype",
+    "set_local_variable_type",
+})
+
+# Every client method the AI is allowed to call as a tool
+TOOL_COMMANDS = READ_ONLY_COMMANDS | WRITE_COMMANDS
+
 class GhidraMCPClient:
     """Client for interacting with GhidraMCP API."""
     
@@ -24,7 +42,11 @@ class GhidraMCPClient:
             config: GhidraMCPConfig object with connection details
         """
         self.config = config
-        self.client = httpx.Client(timeout=config.timeout)
+        # One pooled client for all tool calls so successive requests reuse keep-alive connections
+        self.client = httpx.Client(
+            timeout=config.timeout,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+        )
         self.mock_mode = config.mock_mode
         self.api_version = None
         logger.info(f"Initialized GhidraMCP client at: {config.base_url}")
@@ -33,6 +55,10 @@ class GhidraMCPClient:
         if not self.mock_mode:
             self._detect_api()
     
+    def close(self):
+        """Close the underlying HTTP connection pool."""
+        self.client.close()
+    
     def _detect_api(self):
         """Detect the API version and available endpoints."""
         try:
@@ -65,7 +91,7 @@ class GhidraMCPClient:
         url = f"{self.config.base_url}/{endpoint}"
         
         try:
-            logger.debug(f"Sending GET request to GhidraMCP: {endpoint} with params: {params}")
+            logger.debug("Sending GET request to GhidraMCP: %s with params: %s", endpoint, params)
             response = self.client.get(url, params=params, timeout=self.config.timeout)
             response.encoding = 'utf-8'
             
@@ -95,7 +121,7 @@ class GhidraMCPClient:
         url = f"{self.config.base_url}/{endpoint}"
         
         try:
-            logger.debug(f"Sending POST request to GhidraMCP: {endpoint} with data: {data}")
+            logger.debug("Sending POST request to GhidraMCP: %s with data: %s", endpoint, data)
             
             if isinstance(data, dict):
                 response = self.client.post(url, data=data, timeout=self.config.timeout)
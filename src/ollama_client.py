@@ -4,7 +4,7 @@ Client for interacting with the Ollama API.
 
 import json
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple, Callable
 
 import httpx
 
@@ -12,6 +12,8 @@ from src.config import OllamaConfig
 
 logger = logging.getLogger("ollama-ghidra-bridge.ollama")
 
+JSON_HEADERS = {"Content-Type": "application/json"}
+
 class OllamaClient:
     """Client for interacting with Ollama API."""
     
@@ -32,6 +34,51 @@ class OllamaClient:
         for phase, model in self.config.model_map.items():
             if model:
                 logger.info(f"Using specialized model for {phase} phase: {model}")
+        
+        # The tool definitions are the same in every chat request, so they are encoded only once
+        self._tools_json = json.dumps(config.tools)
+        
+        # Model and system prompt for each phase, resolved once since the config doesn't change after startup
+        self._phase_settings = {
+            phase: self._resolve_phase_settings(phase)
+            for phase in (None, "planning", "execution", "analysis")
+        }
+    
+    def close(self):
+        """Close the underlying HTTP connection pool."""
+        self.client.close()
+    
+    def _resolve_phase_settings(self, phase: Optional[str]) -> Tuple[str, str]:
+        """
+        Determine the model and system prompt to use for a phase.
+        
+        Args:
+            phase: The phase of the agent process (planning, execution, analysis) or None
+            
+        Returns:
+            Tuple of (model, system_prompt)
+        """
+        # Get phase-appropriate model if specified in model_map
+        model = self.config.model
+        if phase and phase in self.config.model_map and self.config.model_map[phase]:
+            model = self.config.model_map[phase]
+        
+        # Get phase-appropriate system prompt
+        phase_system_prompt = None
+        
+        # First check if there's a specific override in phase_system_prompts
+        if phase in self.config.phase_system_prompts and self.config.phase_system_prompts[phase]:
+            phase_system_prompt = self.config.phase_system_prompts[phase]
+            logger.info(f"Using custom override system prompt for {phase} phase")
+        # Then check for the dedicated phase-specific prompt attribute
+        elif phase == "planning" and hasattr(self.config, "planning_system_prompt"):
+            phase_system_prompt = self.config.planning_system_prompt
+        elif phase == "execution" and hasattr(self.config, "execution_system_prompt"):
+            phase_system_prompt = self.config.execution_system_prompt
+        elif phase == "analysis" and hasattr(self.config, "analysis_system_prompt"):
+            phase_system_prompt = self.config.analysis_system_prompt
+        
+        return model, phase_system_prompt or self.config.default_system_prompt
     
     def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
         """
@@ -54,7 +101,9 @@ class OllamaClient:
             logger.warning(f"Tool calling failed, falling back to generate API: {str(e)}")
             return self._generate_with_model(self.config.model, prompt, system_prompt)
     
-    def _chat_with_tools(self, model: str, prompt: str, system_prompt: Optional[str] = None) -> str:
+    def _chat_with_tools(self, model: str, prompt: str, system_prompt: Optional[str] = None,
+                         stop_markers: Optional[Tuple[str, ...]] = None,
+                         on_content: Optional[Callable[[str], None]] = None) -> str:
         """
         Send a prompt to the Ollama chat API with tool support.
         
@@ -62,6 +111,9 @@ class OllamaClient:
             model: The model to use
             prompt: The user prompt to send to the model
             system_prompt: Optional system prompt to guide the model
+            stop_markers: Optional markers that end generation early; when given the
+                response is streamed and the request is aborted once a marker appears
+            on_content: Optional callback receiving the accumulated text as it streams in
             
         Returns:
             The model's response as a string
@@ -74,19 +126,22 @@ class OllamaClient:
         payload = {
             "model": model,
             "messages": messages,
-            "stream": False,
-            "tools": self.config.tools
+            "stream": bool(stop_markers or on_content)
         }
         
         if system_prompt:
             payload["system"] = system_prompt
         
         try:
-            logger.debug(f"Sending chat request to Ollama model '{model}' with tools: {prompt[:100]}...")
-            response = self.client.post(self.chat_url, json=payload)
-            response.raise_for_status()
-            
-            result = response.json()
+            logger.debug("Sending chat request to Ollama model '%s' with tools: %.100s...", model, prompt)
+            if stop_markers or on_content:
+                result = self._stream_chat(payload, stop_markers or (), on_content)
+            else:
+                response = self.client.post(self.chat_url, content=self._encode_chat_payload(payload),
+                                            headers=JSON_HEADERS)
+                response.raise_for_status()
+                
+                result = response.json()
             
             # Handle tool calls if present
             if "message" in result and "tool_calls" in result["message"]:
@@ -124,7 +179,82 @@ class OllamaClient:
             logger.error(f"Error with chat API: {str(e)}")
             raise
     
-    def generate_with_phase(self, prompt: str, phase: str = None, system_prompt: Optional[str] = None) -> str:
+    def _encode_chat_payload(self, payload: Dict[str, Any]) -> bytes:
+        """
+        Encode a chat request body, splicing in the pre-encoded tool definitions.
+        
+        Args:
+            payload: The chat request payload without the tools
+            
+        Returns:
+            The JSON request body
+        """
+        # Each member is encoded on its own, so this doesn't depend on how dumps lays out an object
+        members = [f"{json.dumps(key)}: {json.dumps(value)}" for key, value in payload.items()]
+        members.append(f'"tools": {self._tools_json}')
+        return ("{" + ", ".join(members) + "}").encode("utf-8")
+    
+    def _stream_chat(self, payload: Dict[str, Any], stop_markers: Tuple[str, ...],
+                     on_content: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        Stream a chat request and stop reading as soon as one of the stop markers is generated.
+        
+        Closing the stream aborts the HTTP request, which makes Ollama stop generating
+        instead of producing tokens that would be discarded anyway.
+        
+        Args:
+            payload: The chat request payload (with streaming enabled, without the tools)
+            stop_markers: Markers that end the response; the text from the marker on is dropped
+            on_content: Optional callback receiving the accumulated text after each chunk,
+                so callers can act on it before generation completes
+            
+        Returns:
+            A result dictionary shaped like a non-streaming chat response
+            
+        Raises:
+            RuntimeError: If Ollama reports an error in the stream
+        """
+        content = ""
+        tool_calls = []
+        # Only the tail of the buffer can contain a marker completed by the latest chunk
+        overlap = max((len(marker) for marker in stop_markers), default=0)
+        
+        with self.client.stream("POST", self.chat_url, content=self._encode_chat_payload(payload),
+                                headers=JSON_HEADERS) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                # Failures after the stream has started arrive as an error line, not an HTTP status
+                if chunk.get("error"):
+                    raise RuntimeError(f"Ollama streaming error: {chunk['error']}")
+                message = chunk.get("message", {})
+                tool_calls.extend(message.get("tool_calls", []))
+                
+                piece = message.get("content", "")
+                if piece:
+                    scan_from = max(len(content) - overlap, 0)
+                    content += piece
+                    hits = [idx for idx in (content.find(marker, scan_from) for marker in stop_markers) if idx != -1]
+                    if hits:
+                        content = content[:min(hits)]
+                        logger.info("Stop marker generated, aborting streamed response early")
+                        break
+                    if on_content:
+                        on_content(content)
+                        
+                if chunk.get("done"):
+                    break
+        
+        message = {"role": "assistant", "content": content}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        return {"message": message}
+    
+    def generate_with_phase(self, prompt: str, phase: str = None, system_prompt: Optional[str] = None,
+                            stop_markers: Optional[Tuple[str, ...]] = None,
+                            on_content: Optional[Callable[[str], None]] = None) -> str:
         """
         Send a prompt to the Ollama API with a specific phase.
         Uses the appropriate model and system prompt for the given phase.
@@ -133,6 +263,8 @@ class OllamaClient:
             prompt: The user prompt to send to the model
             phase: The phase of the agent process (planning, execution, analysis)
             system_prompt: Optional system prompt to override the default
+            stop_markers: Optional markers that end generation early (see _stream_chat)
+            on_content: Optional callback receiving the text as it streams in (see _stream_chat)
             
         Returns:
             The model's response as a string
@@ -140,37 +272,13 @@ class OllamaClient:
         Raises:
             Exception: If the request fails
         """
-        # Get phase-appropriate model if specified in model_map
-        model = self.config.model
-        if phase and phase in self.config.model_map and self.config.model_map[phase]:
-            model = self.config.model_map[phase]
-            logger.info(f"Using specialized model for {phase} phase: {model}")
-        
-        # Get phase-appropriate system prompt
-        phase_system_prompt = None
-        
-        # First check if there's a specific override in phase_system_prompts
-        if system_prompt is None and phase in self.config.phase_system_prompts and self.config.phase_system_prompts[phase]:
-            phase_system_prompt = self.config.phase_system_prompts[phase]
-            logger.info(f"Using custom override system prompt for {phase} phase")
-        # Then check for the dedicated phase-specific prompt attribute
-        elif system_prompt is None:
-            if phase == "planning" and hasattr(self.config, "planning_system_prompt"):
-                phase_system_prompt = self.config.planning_system_prompt
-                logger.info(f"Using planning system prompt")
-            elif phase == "execution" and hasattr(self.config, "execution_system_prompt"):
-                phase_system_prompt = self.config.execution_system_prompt
-                logger.info(f"Using execution system prompt")
-            elif phase == "analysis" and hasattr(self.config, "analysis_system_prompt"):
-                phase_system_prompt = self.config.analysis_system_prompt
-                logger.info(f"Using analysis system prompt")
-        
-        # Use provided system_prompt, or phase-specific one, or default
-        final_system_prompt = system_prompt or phase_system_prompt or self.config.default_system_prompt
+        # Phase-appropriate model and system prompt (a provided system_prompt takes precedence)
+        model, phase_system_prompt = self._phase_settings.get(phase) or self._resolve_phase_settings(phase)
+        final_system_prompt = system_prompt or phase_system_prompt
         
         # Try with chat API first, fall back to generate API
         try:
-            return self._chat_with_tools(model, prompt, final_system_prompt)
+            return self._chat_with_tools(model, prompt, final_system_prompt, stop_markers, on_content)
         except Exception as e:
             logger.warning(f"Tool calling failed for phase {phase}, falling back to generate API: {str(e)}")
             return self._generate_with_model(model, prompt, final_system_prompt)
@@ -200,7 +308,7 @@ class OllamaClient:
             payload["system"] = system_prompt
         
         try:
-            logger.debug(f"Sending prompt to Ollama model '{model}' using generate API: {prompt[:100]}...")
+            logger.debug("Sending prompt to Ollama model '%s' using generate API: %.100s...", model, prompt)
             response = self.client.post(self.generate_url, json=payload)
             response.raise_for_status()
             
@@ -210,7 +318,7 @@ class OllamaClient:
                 try:
                     # Try to parse as a single JSON object
                     result = response.json()
-                    logger.debug(f"Received response from Ollama: {result.get('response', '')[:100]}...")
+                    logger.debug("Received response from Ollama: %.100s...", result.get('response', ''))
                     return result.get("response", "")
                 except json.JSONDecodeError:
                     # If it fails, try to parse as multiple JSON objects (stream)
@@ -0,0 +1,197 @@
+"""
+Plan cache for reusing planning responses across similar queries.
+"""
+
+import json
+import logging
+import os
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger("ollama-ghidra-bridge.plan_cache")
+
+# Word tokens used to compare queries (case-insensitive)
+TOKEN_PATTERN = re.compile(r"\w+")
+# Tokens naming something in the program (0x401000, fun_401000, parse_header): a digit or underscore
+IDENTIFIER_TOKEN_PATTERN = re.compile(r"\w*[\d_]\w*")
+
+class PlanCache:
+    """
+    In-memory cache of planning responses keyed by the user query.
+    
+    Queries are compared by the Jaccard similarity of their word sets, so a
+    rephrasing with the same key terms still hits. The words two queries share
+    must also appear in the same order, so a reordering that changes the meaning
+    ("rename main to entry" / "rename entry to main") misses. The least
+    frequently used entry is evicted once the cache is full.
+    
+    Addresses and identifier-like names must match exactly: a query about a
+    different function is never served another function's plan, however similar
+    the rest of the wording is.
+    """
+    
+    def __init__(self, max_entries: int = 64, threshold: float = 0.9,
+                 cache_file: Optional[str] = None, cache_key: str = ""):
+        """
+        Initialize the plan cache.
+        
+        Args:
+            max_entries: Maximum number of cached plans
+            threshold: Minimum similarity (0-1) for a cached plan to be reused
+            cache_file: Optional JSON file the cache is loaded from and saved to, so plans
+                survive across runs (e.g. one process per piped query). Plans name the functions
+                and addresses of the program they were made for, and GhidraMCP doesn't report which
+                program is open, so the file must be specific to one program
+            cache_key: Identifies what the plans were created with (e.g. the planning model);
+                a cache file saved under a different key is ignored
+        """
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.cache_file = cache_file
+        self.cache_key = cache_key
+        self.entries: List[Dict[str, Any]] = []  # [{'query': str, 'tokens': frozenset, 'identifiers': frozenset, 'plan': str, 'hits': int}]
+        # Same entries keyed by normalized query, for exact repeats. Not keyed by the token set:
+        # "rename main to entry" and "rename entry to main" have the same words but opposite plans
+        self._by_query: Dict[str, Dict[str, Any]] = {}
+        
+        if self.cache_file:
+            self._load()
+    
+    def _load(self) -> None:
+        """Load the cached plans from the cache file, if it exists and matches the cache key."""
+        # A size of 0 disables the cache (see store); slicing with [-0:] would load every entry
+        if self.max_entries <= 0:
+            return
+        
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Could not load plan cache from '{self.cache_file}': {str(e)}")
+            return
+            
+        if data.get("key") != self.cache_key:
+            logger.info("Ignoring plan cache file created with a different planning model")
+            return
+            
+        # Entries saved before the normalized query was stored can't be told apart from a reordered
+        # query, so they are dropped
+        self.entries = [
+            {"query": entry["query"], "tokens": frozenset(entry["tokens"]),
+             "identifiers": self._identifiers(entry["tokens"]), "plan": entry["plan"], "hits": entry.get("hits", 0)}
+            for entry in data.get("entries", [])[-self.max_entries:]
+            if "query" in entry
+        ]
+        self._by_query = {entry["query"]: entry for entry in self.entries}
+        logger.info(f"Loaded {len(self.entries)} cached plans from '{self.cache_file}'")
+    
+    def _save(self) -> None:
+        """Write the cached plans to the cache file (replaced atomically)."""
+        data = {
+            "key": self.cache_key,
+            "entries": [
+                {"query": entry["query"], "tokens": sorted(entry["tokens"]), "plan": entry["plan"], "hits": entry["hits"]}
+                for entry in self.entries
+            ]
+        }
+        temp_file = f"{self.cache_file}.tmp"
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_file, self.cache_file)
+        except Exception as e:
+            logger.warning(f"Could not save plan cache to '{self.cache_file}': {str(e)}")
+    
+    @staticmethod
+    def _normalize(query: str) -> Tuple[str, frozenset]:
+        """Return a query's lowercase words joined in order, and the set of those words."""
+        words = TOKEN_PATTERN.findall(query.lower())
+        return " ".join(words), frozenset(words)
+    
+    @staticmethod
+    def _identifiers(tokens) -> frozenset:
+        """Return the identifier-like tokens (addresses, function and variable names) of a query."""
+        return frozenset(token for token in tokens if IDENTIFIER_TOKEN_PATTERN.fullmatch(token))
+    
+    @staticmethod
+    def _shared_word_order(normalized: str, shared: frozenset) -> List[str]:
+        """Return the shared words of a normalized query in the order they first appear."""
+        return list(dict.fromkeys(word for word in normalized.split(" ") if word in shared))
+    
+    def lookup(self, query: str) -> Optional[Tuple[str, float]]:
+        """
+        Find the cached plan for the most similar query.
+        
+        Args:
+            query: The user's query
+        
+        Returns:
+            Tuple of (plan_text, similarity) if a plan above the threshold exists, otherwise None
+        """
+        normalized, tokens = self._normalize(query)
+        if not tokens:
+            return None
+        
+        # A query with exactly the same words in the same order is the common repeat and needs no scan
+        exact_entry = self._by_query.get(normalized)
+        if exact_entry is not None:
+            exact_entry["hits"] += 1
+            logger.info("Plan cache hit (exact match)")
+            return exact_entry["plan"], 1.0
+        
+        # Jaccard similarity can't exceed |smaller set| / |larger set|, so entries whose size is
+        # too different to reach the threshold are skipped without building set intersections
+        min_size = self.threshold * len(tokens)
+        max_size = len(tokens) / self.threshold if self.threshold > 0 else float("inf")
+        identifiers = self._identifiers(tokens)
+        
+        best_entry = None
+        best_similarity = 0.0
+        for entry in self.entries:
+            entry_tokens = entry["tokens"]
+            if not min_size <= len(entry_tokens) <= max_size or entry["identifiers"] != identifiers:
+                continue
+            shared_tokens = tokens & entry_tokens
+            shared = len(shared_tokens)
+            similarity = shared / (len(tokens) + len(entry_tokens) - shared)
+            if (similarity > best_similarity and similarity >= self.threshold
+                    and self._shared_word_order(normalized, shared_tokens)
+                    == self._shared_word_order(entry["query"], shared_tokens)):
+                best_entry, best_similarity = entry, similarity
+        
+        if best_entry is None or best_similarity < self.threshold:
+            return None
+        
+        best_entry["hits"] += 1
+        logger.info(f"Plan cache hit (similarity={best_similarity:.2f})")
+        return best_entry["plan"], best_similarity
+    
+    def store(self, query: str, plan: str) -> None:
+        """
+        Cache the plan created for a query, evicting the least frequently used plan if full.
+        
+        Args:
+            query: The user's query
+            plan: The planning response for the query
+        """
+        normalized, tokens = self._normalize(query)
+        if not tokens or self.max_entries <= 0:
+            return
+        
+        existing = self._by_query.get(normalized)
+        if existing is not None:
+            existing["plan"] = plan
+        else:
+            if len(self.entries) >= self.max_entries:
+                evicted = min(self.entries, key=lambda entry: entry["hits"])
+                self.entries.remove(evicted)
+                del self._by_query[evicted["query"]]
+            
+            entry = {"query": normalized, "tokens": tokens, "identifiers": self._identifiers(tokens), "plan": plan, "hits": 0}
+            self.entries.append(entry)
+            self._by_query[normalized] = entry
+        
+        if self.cache_file:
+            self._save()